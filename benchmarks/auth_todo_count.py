@@ -0,0 +1,94 @@
+"""Auth latency as the number of todos owned by the caller grows.
+
+    python -m benchmarks.auth_todo_count --url sqlite+aiosqlite:///bench.db
+
+Every authenticated request resolves the current user; the cost of that
+lookup must not depend on how many todos the user has.
+"""
+
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+
+from sqlalchemy import insert
+
+from benchmarks.common import api_client, database, measure
+from fast_zero.models import Todo, TodoState, User
+from fast_zero.security import (
+    create_access_token,
+    get_password_hash,
+    principal_cache,
+)
+
+TODO_COUNTS = (10, 100, 1_000, 10_000, 100_000)
+BATCH_SIZE = 10_000
+
+
+async def seed(engine, todo_count):
+    async with engine.begin() as conn:
+        user_id = await conn.scalar(
+            insert(User)
+            .values(
+                username='bench',
+                email='bench@bench.com',
+                password=get_password_hash('bench'),
+            )
+            .returning(User.id)
+        )
+        for start in range(0, todo_count, BATCH_SIZE):
+            size = min(BATCH_SIZE, todo_count - start)
+            await conn.execute(
+                insert(Todo),
+                [
+                    {
+                        'title': f'todo {start + i}',
+                        'description': 'benchmark',
+                        'state': TodoState.todo,
+                        'user_id': user_id,
+                    }
+                    for i in range(size)
+                ],
+            )
+
+    return user_id
+
+
+async def run(url, repeat):
+    results = []
+    for todo_count in TODO_COUNTS:
+        async with database(url) as engine:
+            user_id = await seed(engine, todo_count)
+            token = create_access_token(data={'sub': str(user_id)})
+            headers = {'Authorization': f'Bearer {token}'}
+
+            async with api_client(engine) as client:
+
+                async def refresh():
+                    # Measure the database lookup, not the principal cache.
+                    principal_cache.clear()
+                    response = await client.post(
+                        '/auth/refresh_token', headers=headers
+                    )
+                    assert response.status_code == HTTPStatus.OK
+
+                await refresh()
+                stats = await measure(refresh, repeat=repeat)
+
+        results.append({'todos': todo_count, **stats})
+        print(json.dumps(results[-1]))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///bench.db')
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
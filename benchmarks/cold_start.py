@@ -0,0 +1,94 @@
+"""Time from process start to the first 200 response, per boot sequence.
+
+    python -m benchmarks.cold_start --url sqlite+aiosqlite:////tmp/cold.db
+
+``separate`` is the old entrypoint: ``alembic upgrade head`` followed by
+the server in a new interpreter. ``in_process`` is ``fast_zero.server
+--migrate``, which checks the schema head and starts serving from the same
+process. Each boot also reports the startup marks from /internal/startup.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from http import HTTPStatus
+
+from benchmarks.common import summarize
+
+SEQUENCES = {
+    'separate': ('alembic upgrade head && exec {python} -m fast_zero.server'),
+    'in_process': 'exec {python} -m fast_zero.server --migrate',
+}
+
+
+def wait_for_ok(base_url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(base_url, timeout=1) as response:
+                if response.status == HTTPStatus.OK:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.01)
+
+    raise TimeoutError(f'{base_url} did not answer in {timeout}s')
+
+
+def boot(sequence, env, port, timeout):
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        ['sh', '-c', SEQUENCES[sequence].format(python=sys.executable)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        base_url = f'http://127.0.0.1:{port}'
+        wait_for_ok(base_url + '/', timeout)
+        elapsed = time.perf_counter() - started_at
+        with urllib.request.urlopen(base_url + '/internal/startup') as resp:
+            marks = json.load(resp)
+    finally:
+        process.terminate()
+        process.wait()
+
+    return elapsed, marks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:////tmp/cold.db')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--boots', type=int, default=5)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--no-warmup', action='store_true')
+    args = parser.parse_args()
+
+    env = {
+        **os.environ,
+        'DATABASE_URL': args.url,
+        'SERVER_PORT': str(args.port),
+        'SERVER_WORKERS': '1',
+        'STARTUP_WARMUP': str(not args.no_warmup).lower(),
+    }
+    env.setdefault('SECRET_KEY', 'benchmark-secret-key-with-at-least-32-bytes')
+    env.setdefault('ALGORITHM', 'HS256')
+    env.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+
+    for sequence in SEQUENCES:
+        samples = []
+        for _ in range(args.boots):
+            elapsed, marks = boot(sequence, env, args.port, args.timeout)
+            samples.append(elapsed)
+        print(
+            json.dumps({'sequence': sequence, **summarize(samples), **marks})
+        )
+
+
+if __name__ == '__main__':
+    main()
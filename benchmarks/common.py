@@ -0,0 +1,94 @@
+import os
+import statistics
+import time
+from contextlib import asynccontextmanager
+
+os.environ.setdefault('DATABASE_URL', 'sqlite+aiosqlite:///:memory:')
+os.environ.setdefault(
+    'SECRET_KEY', 'benchmark-secret-key-with-at-least-32-bytes'
+)
+os.environ.setdefault('ALGORITHM', 'HS256')
+os.environ.setdefault('ACCESS_TOKEN_EXPIRE_MINUTES', '30')
+# Benchmarks hammer login and signup from one address on purpose.
+os.environ.setdefault('RATE_LIMIT_ENABLED', 'false')
+
+from httpx import ASGITransport, AsyncClient  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncSession,
+    create_async_engine,
+)
+
+from fast_zero.app import app  # noqa: E402
+from fast_zero.database import (  # noqa: E402
+    enforce_foreign_keys,
+    get_read_session,
+    get_session,
+)
+from fast_zero.models import table_registry  # noqa: E402
+
+
+@asynccontextmanager
+async def database(url):
+    connect_args = {}
+    if url.startswith('sqlite'):
+        # SQLite has a single writer; under concurrent load, queue for the
+        # lock instead of failing after the driver's default five seconds.
+        connect_args['timeout'] = 60
+    engine = enforce_foreign_keys(
+        create_async_engine(url, connect_args=connect_args)
+    )
+
+    async with engine.begin() as conn:
+        if engine.dialect.name == 'sqlite':
+            # Let readers run alongside the single writer, as Postgres does.
+            await conn.exec_driver_sql('PRAGMA journal_mode=WAL')
+        await conn.run_sync(table_registry.metadata.drop_all)
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@asynccontextmanager
+async def api_client(engine):
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url='http://bench'
+        ) as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
+
+
+async def measure(func, *, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append(time.perf_counter() - start)
+
+    return summarize(samples)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+    return {
+        'count': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(0.50) * 1000,
+        'p95_ms': percentile(0.95) * 1000,
+        'p99_ms': percentile(0.99) * 1000,
+    }
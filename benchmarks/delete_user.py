@@ -0,0 +1,61 @@
+"""Account deletion latency as the number of todos owned grows.
+
+    python -m benchmarks.delete_user --url sqlite+aiosqlite:///bench.db
+
+Deleting a user is one DELETE that the database cascades to the todos and
+counters; no todo is loaded into the process, whatever the count.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from http import HTTPStatus
+
+from sqlalchemy import func, select
+
+from benchmarks.auth_todo_count import TODO_COUNTS, seed
+from benchmarks.common import api_client, database
+from fast_zero.models import Todo
+from fast_zero.security import create_access_token
+
+
+async def run(url):
+    results = []
+    for todo_count in TODO_COUNTS:
+        async with database(url) as engine:
+            user_id = await seed(engine, todo_count)
+            token = create_access_token(data={'sub': str(user_id)})
+
+            async with api_client(engine) as client:
+                started_at = time.perf_counter()
+                response = await client.delete(
+                    f'/users/{user_id}',
+                    headers={'Authorization': f'Bearer {token}'},
+                )
+                elapsed = time.perf_counter() - started_at
+                assert response.status_code == HTTPStatus.OK
+
+            async with engine.connect() as conn:
+                remaining = await conn.scalar(select(func.count(Todo.id)))
+
+        results.append({
+            'todos': todo_count,
+            'seconds': elapsed,
+            'remaining_todos': remaining,
+        })
+        print(json.dumps(results[-1]))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///bench.db')
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url))
+
+
+if __name__ == '__main__':
+    main()
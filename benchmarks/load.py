@@ -0,0 +1,270 @@
+"""End-to-end load scenarios for the API.
+
+    python -m benchmarks.load --url sqlite+aiosqlite:///bench.db
+    python -m benchmarks.load --url postgresql+psycopg://app@localhost/app
+    python -m benchmarks.load --base-url http://127.0.0.1:8000
+
+By default the app runs in-process over an ASGI transport against ``--url``
+(schema recreated on every run); with ``--base-url`` the scenarios drive a
+server that is already running. Start that server with
+``RATE_LIMIT_ENABLED=false``, as the in-process app is, or the signups and
+logins get throttled. Results are printed as JSON and, with ``--baseline``,
+compared against a previous run: any scenario whose p95 latency grows or
+whose throughput drops by more than ``--threshold`` fails the run.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+from contextlib import asynccontextmanager
+from http import HTTPStatus
+from pathlib import Path
+
+from httpx import AsyncClient
+
+from benchmarks.common import api_client, database, summarize
+
+PASSWORD = 'benchmark-password'
+STATES = ('draft', 'todo', 'doing', 'done', 'trash')
+
+
+class Context:
+    def __init__(self, client, run_id):
+        self.client = client
+        self.run_id = run_id
+        self.counter = itertools.count()
+        self.tokens = []
+
+    def unique(self, prefix):
+        return f'{prefix}-{self.run_id}-{next(self.counter)}'
+
+    def headers(self, i):
+        return {'Authorization': f'Bearer {self.tokens[i % len(self.tokens)]}'}
+
+
+def _check(response, *expected):
+    if response.status_code == HTTPStatus.TOO_MANY_REQUESTS:
+        raise RuntimeError(
+            f'{response.request.url.path} was rate limited; run the target '
+            'server with RATE_LIMIT_ENABLED=false'
+        )
+    if response.status_code not in expected:
+        raise RuntimeError(
+            f'{response.request.method} {response.request.url.path} '
+            f'returned {response.status_code}: {response.text[:200]}'
+        )
+    return response
+
+
+async def signup(ctx, i):
+    username = ctx.unique('user')
+    _check(
+        await ctx.client.post(
+            '/users/',
+            json={
+                'username': username,
+                'email': f'{username}@bench.com',
+                'password': PASSWORD,
+            },
+        ),
+        HTTPStatus.CREATED,
+    )
+    return username
+
+
+async def login(ctx, i, username=None):
+    username = username or ctx.usernames[i % len(ctx.usernames)]
+    response = _check(
+        await ctx.client.post(
+            '/auth/token',
+            data={'username': f'{username}@bench.com', 'password': PASSWORD},
+        ),
+        HTTPStatus.OK,
+    )
+    return response.json()['access_token']
+
+
+async def token_refresh(ctx, i):
+    _check(
+        await ctx.client.post('/auth/refresh_token', headers=ctx.headers(i)),
+        HTTPStatus.OK,
+    )
+
+
+async def list_todos(ctx, i):
+    params = [
+        {'limit': 20},
+        {'limit': 20, 'state': STATES[i % len(STATES)]},
+        {'limit': 20, 'title': 'bench'},
+        {'limit': 20, 'order_by': 'updated_at'},
+    ][i % 4]
+    _check(
+        await ctx.client.get('/todos/', params=params, headers=ctx.headers(i)),
+        HTTPStatus.OK,
+    )
+
+
+async def mixed_mutations(ctx, i):
+    headers = ctx.headers(i)
+    response = _check(
+        await ctx.client.post(
+            '/todos/',
+            json={
+                'title': ctx.unique('bench'),
+                'description': 'load test',
+                'state': STATES[i % len(STATES)],
+            },
+            headers=headers,
+        ),
+        HTTPStatus.OK,
+    )
+    todo_id = response.json()['id']
+    _check(
+        await ctx.client.patch(
+            f'/todos/{todo_id}', json={'state': 'done'}, headers=headers
+        ),
+        HTTPStatus.OK,
+    )
+    _check(
+        await ctx.client.delete(f'/todos/{todo_id}', headers=headers),
+        HTTPStatus.OK,
+    )
+
+
+SCENARIOS = {
+    'signup': signup,
+    'login': login,
+    'token_refresh': token_refresh,
+    'list_todos': list_todos,
+    'mixed_mutations': mixed_mutations,
+}
+
+
+async def prepare(ctx, users, todos_per_user):
+    ctx.usernames = [await signup(ctx, i) for i in range(users)]
+    ctx.tokens = [
+        await login(ctx, i, username)
+        for i, username in enumerate(ctx.usernames)
+    ]
+    for i in range(users):
+        for _ in range(todos_per_user):
+            _check(
+                await ctx.client.post(
+                    '/todos/',
+                    json={
+                        'title': ctx.unique('bench'),
+                        'description': 'seeded todo',
+                        'state': STATES[i % len(STATES)],
+                    },
+                    headers=ctx.headers(i),
+                ),
+                HTTPStatus.OK,
+            )
+
+
+async def run_scenario(ctx, scenario, requests, concurrency):
+    samples = []
+    iterations = iter(range(requests))
+
+    async def worker():
+        for i in iterations:
+            started_at = time.perf_counter()
+            await scenario(ctx, i)
+            samples.append(time.perf_counter() - started_at)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    return {'throughput_rps': len(samples) / elapsed, **summarize(samples)}
+
+
+@asynccontextmanager
+async def open_client(args):
+    if args.base_url:
+        async with AsyncClient(base_url=args.base_url) as client:
+            yield client
+        return
+
+    async with database(args.url) as engine, api_client(engine) as client:
+        yield client
+
+
+async def run(args):
+    results = {}
+
+    async with open_client(args) as client:
+        ctx = Context(client, run_id=int(time.time()))
+        await prepare(ctx, args.users, args.todos_per_user)
+
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                ctx, SCENARIOS[name], args.requests, args.concurrency
+            )
+            print(f'{name}: {json.dumps(results[name])}', file=sys.stderr)
+
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]:.2f}ms -> '
+                f'{current["p95_ms"]:.2f}ms'
+            )
+        if current['throughput_rps'] < previous['throughput_rps'] * (
+            1 - threshold
+        ):
+            regressions.append(
+                f'{name}: throughput {previous["throughput_rps"]:.1f} -> '
+                f'{current["throughput_rps"]:.1f} req/s'
+            )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///bench.db')
+    parser.add_argument('--base-url')
+    parser.add_argument(
+        '--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS)
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--users', type=int, default=10)
+    parser.add_argument('--todos-per-user', type=int, default=50)
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    report = json.dumps(results, indent=2)
+    print(report)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(report)
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.threshold
+        )
+        for regression in regressions:
+            print(f'REGRESSION {regression}', file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
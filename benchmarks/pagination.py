@@ -0,0 +1,65 @@
+"""Latency of the first and a deep page of GET /todos, offset vs cursor.
+
+python -m benchmarks.pagination --url sqlite+aiosqlite:///bench.db
+"""
+
+import argparse
+import asyncio
+import json
+from http import HTTPStatus
+from types import SimpleNamespace
+
+from benchmarks.auth_todo_count import seed
+from benchmarks.common import api_client, database, measure
+from fast_zero.models import Todo
+from fast_zero.pagination import encode_cursor
+from fast_zero.security import create_access_token
+
+
+async def run(url, page_size, deep_page, repeat):
+    todo_count = page_size * (deep_page + 1)
+    results = []
+
+    async with database(url) as engine:
+        user_id = await seed(engine, todo_count)
+        token = create_access_token(data={'sub': str(user_id)})
+        headers = {'Authorization': f'Bearer {token}'}
+
+        async with api_client(engine) as client:
+            for page in (1, deep_page):
+                last_id = (page - 1) * page_size
+                cursor = encode_cursor((Todo.id,), SimpleNamespace(id=last_id))
+                modes = {
+                    'offset': f'offset={last_id}',
+                    'cursor': f'cursor={cursor}',
+                }
+                for mode, params in modes.items():
+
+                    async def fetch(params=params):
+                        response = await client.get(
+                            f'/todos/?limit={page_size}&{params}',
+                            headers=headers,
+                        )
+                        assert response.status_code == HTTPStatus.OK
+
+                    await fetch()
+                    stats = await measure(fetch, repeat=repeat)
+                    results.append({'page': page, 'mode': mode, **stats})
+                    print(json.dumps(results[-1]))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///bench.db')
+    parser.add_argument('--page-size', type=int, default=10)
+    parser.add_argument('--deep-page', type=int, default=10_000)
+    parser.add_argument('--repeat', type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.page_size, args.deep_page, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Per-row cost of the ORM read path versus Core rows encoded to bytes.
+
+    python -m benchmarks.read_path
+
+Both paths read the same page of todos from SQLite and produce the JSON
+body of GET /todos: the ORM path validates mapped instances against
+TodoList and serializes them the way FastAPI does, the fast path encodes
+Core rows with fast_zero.responses.dumps.
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.auth_todo_count import seed
+from benchmarks.common import database
+from fast_zero.models import Todo
+from fast_zero.responses import dumps
+from fast_zero.routers.todos import TODO_PUBLIC_COLUMNS
+from fast_zero.schemas import TodoList
+
+
+async def orm_path(session, page_size):
+    todos = await session.scalars(
+        select(Todo).order_by(Todo.id).limit(page_size)
+    )
+    content = TodoList.model_validate(
+        {'todos': todos.all()}, from_attributes=True
+    )
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+async def core_path(session, page_size):
+    rows = await session.execute(
+        select(*TODO_PUBLIC_COLUMNS).order_by(Todo.id).limit(page_size)
+    )
+    return dumps({'todos': [row._asdict() for row in rows]})
+
+
+async def profile(engine, path, page_size, repeat):
+    async with AsyncSession(engine) as session:
+        await path(session, page_size)
+
+        cpu_started = time.process_time()
+        for _ in range(repeat):
+            await path(session, page_size)
+            session.expunge_all()
+        cpu_seconds = time.process_time() - cpu_started
+
+        tracemalloc.start()
+        await path(session, page_size)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    rows = page_size * repeat
+
+    return {
+        'cpu_us_per_row': cpu_seconds / rows * 1_000_000,
+        'peak_bytes_per_row': peak_bytes / page_size,
+    }
+
+
+async def run(page_sizes, repeat):
+    results = []
+
+    async with database('sqlite+aiosqlite:///:memory:') as engine:
+        await seed(engine, max(page_sizes))
+
+        for page_size in page_sizes:
+            for name, path in (('orm', orm_path), ('core', core_path)):
+                stats = await profile(engine, path, page_size, repeat)
+                results.append({'path': name, 'rows': page_size, **stats})
+                print(json.dumps(results[-1]))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[100, 1000])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""Per-call cost of the authentication primitives in fast_zero.security.
+
+    python -m benchmarks.security
+    python -m benchmarks.security --url sqlite+aiosqlite:///bench.db
+    python -m benchmarks.security --output results/security.json
+
+Times token creation and decoding, password hashing and verification for
+a few argon2 parameter sets, and the get_current_user dependency against
+a stubbed session and a real database (cold and warm principal cache),
+resolving both user-id subjects and legacy email subjects.
+Each case reports latency percentiles plus the peak traced memory of one
+call and the blocks still allocated per call after a run, so the numbers
+can be compared from release to release.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tracemalloc
+from pathlib import Path
+
+from jwt import decode
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.auth_todo_count import seed
+from benchmarks.common import database, measure
+from fast_zero.models import User
+from fast_zero.security import (
+    create_access_token,
+    get_current_user,
+    principal_cache,
+    settings,
+)
+
+PASSWORD = 'benchmark-password'
+EMAIL = 'bench@bench.com'
+USER_ID = 1
+
+# (name, time_cost, memory_cost in KiB, parallelism); 'settings' is what
+# the app is configured with.
+ARGON2_PARAMETERS = (
+    (
+        'settings',
+        settings.PASSWORD_HASH_TIME_COST,
+        settings.PASSWORD_HASH_MEMORY_COST,
+        settings.PASSWORD_HASH_PARALLELISM,
+    ),
+    ('owasp-min', 2, 19_456, 1),
+    ('light', 1, 8_192, 1),
+)
+
+
+class StubSession:
+    """Answers the user lookup without touching a database."""
+
+    def __init__(self, user):
+        self.user = user
+
+    async def get(self, entity, ident):
+        return self.user
+
+    async def scalar(self, statement):
+        return self.user
+
+
+async def allocations(func, repeat):
+    await func()
+    gc.collect()
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    await func()
+    _, peak = tracemalloc.get_traced_memory()
+
+    blocks = sys.getallocatedblocks()
+    for _ in range(repeat):
+        await func()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+    tracemalloc.stop()
+
+    return {
+        'peak_bytes': peak - before,
+        'retained_blocks_per_call': retained / repeat,
+    }
+
+
+async def bench(name, func, repeat):
+    stats = await measure(func, repeat=repeat)
+    stats.update(await allocations(func, min(repeat, 100)))
+    result = {'case': name, **stats}
+    print(json.dumps(result))
+
+    return result
+
+
+def token_cases():
+    token = create_access_token(data={'sub': str(USER_ID)})
+
+    async def encode_token():
+        create_access_token(data={'sub': str(USER_ID)})
+
+    async def decode_token():
+        decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    return [('create_access_token', encode_token), ('decode', decode_token)]
+
+
+def password_cases():
+    cases = []
+    for name, time_cost, memory_cost, parallelism in ARGON2_PARAMETERS:
+        context = PasswordHash((
+            Argon2Hasher(
+                time_cost=time_cost,
+                memory_cost=memory_cost,
+                parallelism=parallelism,
+            ),
+        ))
+        hashed = context.hash(PASSWORD)
+
+        async def hash_password(context=context):
+            context.hash(PASSWORD)
+
+        async def verify_password(context=context, hashed=hashed):
+            assert context.verify(PASSWORD, hashed)
+
+        cases.extend([
+            (f'get_password_hash[{name}]', hash_password),
+            (f'verify_password[{name}]', verify_password),
+        ])
+
+    return cases
+
+
+def current_user_cases(session, label):
+    cases = []
+    for subject in (str(USER_ID), EMAIL):
+        token = create_access_token(data={'sub': subject})
+        lookup = 'id' if subject.isdigit() else 'email'
+
+        async def cold(token=token):
+            principal_cache.clear()
+            await get_current_user(session=session, token=token)
+
+        async def warm(token=token):
+            await get_current_user(session=session, token=token)
+
+        cases.extend([
+            (f'get_current_user[{label},{lookup},cold]', cold),
+            (f'get_current_user[{label},{lookup},warm]', warm),
+        ])
+
+    return cases
+
+
+async def run(url, repeat, password_repeat):
+    results = [await bench(name, func, repeat) for name, func in token_cases()]
+    results.extend([
+        await bench(name, func, password_repeat)
+        for name, func in password_cases()
+    ])
+
+    user = User(username='bench', email=EMAIL, password='')
+    user.id = USER_ID
+    results.extend([
+        await bench(name, func, repeat)
+        for name, func in current_user_cases(StubSession(user), 'stub')
+    ])
+
+    async with database(url) as engine:
+        assert await seed(engine, 0) == USER_ID
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            results.extend([
+                await bench(name, func, repeat)
+                for name, func in current_user_cases(session, 'db')
+            ])
+
+    principal_cache.clear()
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///:memory:')
+    parser.add_argument('--repeat', type=int, default=2_000)
+    parser.add_argument('--password-repeat', type=int, default=20)
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.repeat, args.password_repeat))
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2) + '\n')
+
+
+if __name__ == '__main__':
+    main()
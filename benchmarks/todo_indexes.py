@@ -0,0 +1,134 @@
+"""Hot todo queries before and after the access path indexes exist.
+
+    python -m benchmarks.todo_indexes --url postgresql+psycopg://...
+
+Seeds ``--rows`` todos spread over ``--users`` users, drops the indexes
+declared on ``Todo``, times the query shapes used by the todo routes,
+then recreates the indexes and times them again.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.schema import CreateIndex, DropIndex
+
+from benchmarks.common import database, measure
+from fast_zero.models import Todo, TodoState, User
+
+BATCH_SIZE = 10_000
+
+
+def query_shapes(user_id, todo_id):
+    owned = select(Todo).where(Todo.user_id == user_id)
+
+    return {
+        'list': owned.order_by(Todo.id).limit(100),
+        'list_state': owned
+        .where(Todo.state == TodoState.doing)
+        .order_by(Todo.id)
+        .limit(100),
+        'list_updated_at': owned.order_by(Todo.updated_at, Todo.id).limit(100),
+        'keyset': owned
+        .where(tuple_(Todo.id) > tuple_(todo_id))
+        .order_by(Todo.id)
+        .limit(100),
+        'patch_lookup': owned.where(Todo.id == todo_id),
+        'login_lookup': select(User).where(
+            User.email == f'user{user_id}@bench.com'
+        ),
+    }
+
+
+async def seed(engine, rows, users):
+    async with engine.begin() as conn:
+        await conn.execute(
+            insert(User),
+            [
+                {
+                    'username': f'user{i}',
+                    'email': f'user{i}@bench.com',
+                    'password': 'x',
+                }
+                for i in range(1, users + 1)
+            ],
+        )
+        states = list(TodoState)
+        for start in range(0, rows, BATCH_SIZE):
+            await conn.execute(
+                insert(Todo),
+                [
+                    {
+                        'title': f'todo {i}',
+                        'description': 'benchmark',
+                        'state': states[i % len(states)],
+                        'user_id': i % users + 1,
+                    }
+                    for i in range(start, min(rows, start + BATCH_SIZE))
+                ],
+            )
+
+
+async def time_queries(engine, users, rows, repeat):
+    results = {}
+    rng = random.Random(0)
+
+    async with engine.connect() as conn:
+        for name in query_shapes(1, 1):
+
+            async def run_query(name=name):
+                shapes = query_shapes(
+                    rng.randint(1, users), rng.randint(1, rows)
+                )
+                await conn.execute(shapes[name])
+
+            results[name] = await measure(run_query, repeat=repeat)
+
+    return results
+
+
+async def run(url, rows, users, repeat):
+    indexes = Todo.__table__.indexes
+
+    async with database(url) as engine:
+        await seed(engine, rows, users)
+
+        async with engine.begin() as conn:
+            for index in indexes:
+                await conn.execute(DropIndex(index))
+        before = await time_queries(engine, users, rows, repeat)
+
+        async with engine.begin() as conn:
+            for index in indexes:
+                await conn.execute(CreateIndex(index))
+        after = await time_queries(engine, users, rows, repeat)
+
+    report = {
+        name: {
+            'before_p50_ms': before[name]['p50_ms'],
+            'after_p50_ms': after[name]['p50_ms'],
+            'before_p95_ms': before[name]['p95_ms'],
+            'after_p95_ms': after[name]['p95_ms'],
+        }
+        for name in before
+    }
+    print(json.dumps(report, indent=2))
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--url', default='sqlite+aiosqlite:///bench.db')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=1_000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.url, args.rows, args.users, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
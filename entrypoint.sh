@@ -1,7 +1,9 @@
 #!/bin/sh
+set -e
 
-# Executa as migrações do banco de dados
-poetry run alembic upgrade head
+# Marca o início do boot para medir o tempo até a primeira resposta
+export BOOT_TIME="$(date +%s.%N)"
 
-# Inicia a aplicação
-poetry run uvicorn --host 0.0.0.0 --port 8000 fast_zero.app:app
\ No newline at end of file
+# Aplica migrações pendentes e inicia a aplicação no mesmo processo;
+# exec para que o servidor receba o SIGTERM
+exec python -m fast_zero.server --migrate
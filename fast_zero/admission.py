@@ -0,0 +1,168 @@
+"""Rate limits for the argon2-bound routes and global load shedding."""
+
+import math
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Annotated
+
+from fastapi import Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordRequestForm
+
+from fast_zero.metrics import LOAD_SHED, RATE_LIMITED
+from fast_zero.settings import get_settings
+
+settings = get_settings()
+
+BUSY_DETAIL = 'Server is busy, try again later'
+
+
+class RateLimiter:
+    """Token buckets per key: ``burst`` requests at once, ``rate`` per second.
+
+    Buckets live in an LRU capped at ``maxsize`` keys, so a flood of
+    distinct keys costs bounded memory; an evicted key starts full again.
+    """
+
+    def __init__(self, rate, burst, *, maxsize=100_000, timer=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.maxsize = maxsize
+        self.timer = timer
+        self._buckets = OrderedDict()
+
+    def acquire(self, key):
+        """Take a token for ``key``; return 0 or seconds until one frees."""
+        now = self.timer()
+        tokens, updated_at = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / self.rate
+
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+
+        return retry_after
+
+    def clear(self):
+        self._buckets.clear()
+
+
+login_ip_limiter = RateLimiter(
+    settings.RATE_LIMIT_LOGIN_IP_RATE, settings.RATE_LIMIT_LOGIN_IP_BURST
+)
+login_account_limiter = RateLimiter(
+    settings.RATE_LIMIT_LOGIN_ACCOUNT_RATE,
+    settings.RATE_LIMIT_LOGIN_ACCOUNT_BURST,
+)
+signup_ip_limiter = RateLimiter(
+    settings.RATE_LIMIT_SIGNUP_IP_RATE, settings.RATE_LIMIT_SIGNUP_IP_BURST
+)
+
+
+def client_ip(request: Request):
+    """Address of the client, as far as it can be trusted.
+
+    CLIENT_IP_HEADER names a header our edge proxy always overwrites, such
+    as Fly-Client-IP; otherwise uvicorn only applies X-Forwarded-For from
+    SERVER_FORWARDED_ALLOW_IPS (see fast_zero.server).
+    """
+    if settings.CLIENT_IP_HEADER and (
+        address := request.headers.get(settings.CLIENT_IP_HEADER)
+    ):
+        return address
+    return request.client.host if request.client else 'unknown'
+
+
+def _check(limiter, key, limit):
+    retry_after = limiter.acquire(key)
+    if retry_after:
+        RATE_LIMITED.inc(limit=limit)
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Too many requests, try again later',
+            headers={'Retry-After': str(math.ceil(retry_after))},
+        )
+
+
+def limit_login(
+    request: Request,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+):
+    if settings.RATE_LIMIT_ENABLED:
+        _check(login_ip_limiter, client_ip(request), 'login_ip')
+        _check(
+            login_account_limiter,
+            form_data.username.lower(),
+            'login_account',
+        )
+
+
+def limit_signup(request: Request):
+    if settings.RATE_LIMIT_ENABLED:
+        _check(signup_ip_limiter, client_ip(request), 'signup_ip')
+
+
+class LoadSheddingMiddleware:
+    """Answers 503 with Retry-After while the server is overloaded.
+
+    Overloaded means more than ``max_in_flight`` requests in progress or a
+    recent pool checkout wait above ``max_pool_wait`` seconds. Requests to
+    ``cheap_paths`` and /internal/ never touch the pool or argon2 and are
+    always let through, so health checks and metrics keep answering.
+    """
+
+    def __init__(
+        self,
+        app,
+        *,
+        pool_monitor,
+        max_in_flight,
+        max_pool_wait,
+        cheap_paths=('/', '/metrics'),
+    ):
+        self.app = app
+        self.pool_monitor = pool_monitor
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait = max_pool_wait
+        self.cheap_paths = frozenset(cheap_paths)
+        self.in_flight = 0
+
+    def _overload_reason(self):
+        if self.in_flight >= self.max_in_flight:
+            return 'in_flight'
+        if self.pool_monitor.recent_wait() > self.max_pool_wait:
+            return 'pool_wait'
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope['type'] != 'http'
+            or scope['path'] in self.cheap_paths
+            or scope['path'].startswith('/internal/')
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        reason = self._overload_reason()
+        if reason:
+            LOAD_SHED.inc(reason=reason)
+            response = JSONResponse(
+                {'detail': BUSY_DETAIL},
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '1'},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.in_flight -= 1
@@ -1,17 +1,94 @@
+import asyncio
+from contextlib import asynccontextmanager
 from http import HTTPStatus
 
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 
-from fast_zero.routers import auth, todos, users
+from fast_zero.admission import LoadSheddingMiddleware
+from fast_zero.database import (
+    ReadYourWritesMiddleware,
+    engine,
+    pool_monitor,
+    replica_engines,
+)
+from fast_zero.metrics import (
+    MetricsMiddleware,
+    instrument_sqlalchemy,
+    registry,
+    update_pool_metrics,
+)
+from fast_zero.routers import auth, internal, todos, users
 from fast_zero.schemas import Message
+from fast_zero.security import hashing_pool
+from fast_zero.settings import get_settings
+from fast_zero.startup import (
+    FirstResponseMiddleware,
+    startup_timer,
+    warm_up,
+    warm_up_hashing,
+)
+from fast_zero.tracing import (
+    TracedJSONResponse,
+    TracingMiddleware,
+    trace_sqlalchemy,
+)
 
-app = FastAPI()
+settings = get_settings()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    background = set()
+    if settings.STARTUP_WARMUP:
+        await warm_up(engine)
+        startup_timer.mark('warmed')
+        # Hashing is slow to warm; logins queue behind it in the pool while
+        # every other request is served right away.
+        background.add(asyncio.create_task(warm_up_hashing()))
+    startup_timer.mark('ready')
+
+    yield
+    await asyncio.gather(*background)
+    hashing_pool.shutdown()
+    for db_engine in (engine, *replica_engines):
+        await db_engine.dispose()
+
+
+instrument_sqlalchemy()
+trace_sqlalchemy()
+
+app = FastAPI(lifespan=lifespan, default_response_class=TracedJSONResponse)
+app.add_middleware(
+    LoadSheddingMiddleware,
+    pool_monitor=pool_monitor,
+    max_in_flight=settings.LOAD_SHED_MAX_IN_FLIGHT,
+    max_pool_wait=settings.LOAD_SHED_MAX_POOL_WAIT,
+)
+app.add_middleware(ReadYourWritesMiddleware)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(FirstResponseMiddleware)
+if settings.TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware, trace_file=settings.TRACE_FILE)
 
 app.include_router(users.router)
 app.include_router(auth.router)
 app.include_router(todos.router)
+app.include_router(internal.router)
 
 
 @app.get('/', status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     return {'message': 'Olá Mundo!'}
+
+
+@app.get('/metrics', include_in_schema=False)
+def read_metrics():
+    update_pool_metrics(pool_monitor.stats(engine))
+
+    return PlainTextResponse(
+        registry.render(), media_type='text/plain; version=0.0.4'
+    )
+
+
+startup_timer.mark('imported')
@@ -0,0 +1,68 @@
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Small LRU cache whose entries also expire after ``ttl`` seconds.
+
+    A ``maxsize`` or ``ttl`` of zero disables the cache.
+    """
+
+    def __init__(self, *, maxsize, ttl, timer=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        item = self._data.get(key)
+
+        if item is None:
+            self.misses += 1
+            return None
+
+        value, expires_at = item
+        if expires_at <= self._timer():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        self._data[key] = (value, self._timer() + self.ttl)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate_where(self, predicate):
+        stale = [
+            key for key, (value, _) in self._data.items() if predicate(value)
+        ]
+        for key in stale:
+            del self._data[key]
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,74 @@
+"""Pick argon2 parameters that hash in about ``--target-ms`` on this host.
+
+    python -m fast_zero.calibrate --target-ms 250
+
+Memory cost is tried first, halving from ``--max-memory-cost`` until a
+single pass fits the target; time cost is then raised while a hash still
+fits. The result is printed as the settings to put in the environment.
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+MIN_MEMORY_COST = 8_192
+MAX_TIME_COST = 32
+PASSWORD = 'calibration-password'
+
+
+def measure_hash(time_cost, memory_cost, parallelism, samples=3):
+    hasher = Argon2Hasher(
+        time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism
+    )
+    durations = []
+    for _ in range(samples):
+        started_at = time.perf_counter()
+        hasher.hash(PASSWORD)
+        durations.append(time.perf_counter() - started_at)
+
+    return statistics.median(durations)
+
+
+def calibrate(target, *, parallelism, max_memory_cost, measure=measure_hash):
+    """Return (time_cost, memory_cost, seconds) for a hash within target."""
+    memory_cost = max_memory_cost
+    elapsed = measure(1, memory_cost, parallelism)
+    while elapsed > target and memory_cost // 2 >= MIN_MEMORY_COST:
+        memory_cost //= 2
+        elapsed = measure(1, memory_cost, parallelism)
+
+    time_cost = 1
+    while time_cost < MAX_TIME_COST:
+        candidate = measure(time_cost + 1, memory_cost, parallelism)
+        if candidate > target:
+            break
+        time_cost += 1
+        elapsed = candidate
+
+    return time_cost, memory_cost, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--target-ms', type=float, default=250.0)
+    parser.add_argument('--parallelism', type=int, default=os.cpu_count())
+    parser.add_argument('--max-memory-cost', type=int, default=65_536)
+    args = parser.parse_args()
+
+    time_cost, memory_cost, elapsed = calibrate(
+        args.target_ms / 1000,
+        parallelism=args.parallelism,
+        max_memory_cost=args.max_memory_cost,
+    )
+
+    print(f'# one hash takes {elapsed * 1000:.0f}ms on this host')
+    print(f'PASSWORD_HASH_TIME_COST={time_cost}')
+    print(f'PASSWORD_HASH_MEMORY_COST={memory_cost}')
+    print(f'PASSWORD_HASH_PARALLELISM={args.parallelism}')
+
+
+if __name__ == '__main__':
+    main()
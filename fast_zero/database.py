@@ -1,10 +1,320 @@
+import itertools
+import math
+import time
+from contextlib import contextmanager
+
+from fastapi import Request
+from jwt import PyJWTError, decode, encode
+from sqlalchemy import event, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.datastructures import MutableHeaders
+
+from fast_zero.admission import client_ip
+from fast_zero.cache import TTLCache
+from fast_zero.settings import Settings, get_settings
+
+settings = get_settings()
+
+WAIT_DECAY_SECONDS = 1.0
+
+
+def engine_options(url: str, settings: Settings):
+    options = {
+        'pool_pre_ping': settings.DATABASE_POOL_PRE_PING,
+        'pool_recycle': settings.DATABASE_POOL_RECYCLE,
+    }
+
+    # In-memory SQLite uses a single shared connection instead of a queue.
+    if make_url(url).database not in {None, '', ':memory:'}:
+        options.update(
+            poolclass=MonitoredQueuePool,
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+
+    return options
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that reports how long each checkout took to ``monitor``.
+
+    Timed here, only real checkouts count: sessions take a connection on
+    their first statement, and requests that never query take none. The
+    pool has no event that fires before a checkout, so the public
+    ``connect()`` is wrapped rather than hooked.
+    """
+
+    monitor = None
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.monitor = self.monitor
+        return pool
+
+    def connect(self):
+        if self.monitor is None:
+            return super().connect()
+        with self.monitor.timing():
+            return super().connect()
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA foreign_keys=ON')
+    cursor.close()
+
+
+def enforce_foreign_keys(engine):
+    """SQLite ignores foreign keys, ON DELETE CASCADE included, by default."""
+    if engine.dialect.name == 'sqlite':
+        event.listen(
+            engine.sync_engine, 'connect', _enable_sqlite_foreign_keys
+        )
+    return engine
+
+
+class PoolMonitor:
+    """Tracks how long requests wait to check a connection out of the pool."""
+
+    def __init__(self, timer=time.monotonic):
+        self.timer = timer
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._recent_wait = 0.0
+        self._recent_wait_at = timer()
+
+    def recent_wait(self):
+        """Longest recent checkout wait, decaying by 1/e every second.
+
+        It also decays while nothing checks out, so load shedding driven by
+        it lets traffic through again once the pool has had time to drain.
+        """
+        age = self.timer() - self._recent_wait_at
+        return self._recent_wait * math.exp(-age / WAIT_DECAY_SECONDS)
+
+    def watch(self, engine):
+        if isinstance(engine.pool, MonitoredQueuePool):
+            engine.pool.monitor = self
+        return engine
+
+    @contextmanager
+    def timing(self):
+        started_at = time.monotonic()
+        try:
+            yield
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait_seconds = time.monotonic() - started_at
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self._recent_wait = max(wait_seconds, self.recent_wait())
+            self._recent_wait_at = self.timer()
+
+    def stats(self, engine):
+        pool = engine.pool
+        stats = {'pool': type(pool).__name__}
+
+        if hasattr(pool, 'checkedout'):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(0, pool.overflow()),
+            )
+
+        return {
+            **stats,
+            'checkouts': self.checkouts,
+            'timeouts': self.timeouts,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+            'wait_seconds_recent': self.recent_wait(),
+        }
 
-from fast_zero.settings import Settings
 
-engine = create_async_engine(Settings().DATABASE_URL)
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+READ_PRIMARY_COOKIE = 'read_primary'
 
 
-async def get_session():  # pragma: no cover
-    async with AsyncSession(engine, expire_on_commit=False) as session:
+class SessionRouter:
+    """Sends writes to the primary and reads to replicas, round-robin.
+
+    Reads made while handling a write, such as resolving the current
+    user, stay on the primary. Once a write commits, the client reads from
+    the primary for ``sticky_seconds`` so it sees its own changes despite
+    replication lag. The window travels with the client as a signed
+    cookie (see :class:`ReadYourWritesMiddleware`), so it holds whichever
+    worker serves the next read. Clients that drop cookies fall back to a
+    per-process window keyed by their credentials, or their address when
+    they send none.
+
+    Whenever a request needs the primary more than once, through both
+    dependencies, it shares one session so it never holds two of its
+    connections at a time.
+    """
+
+    def __init__(
+        self,
+        primary,
+        replicas=(),
+        *,
+        sticky_seconds,
+        secret_key,
+        algorithm='HS256',
+    ):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.sticky_seconds = sticky_seconds
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self._replica_cycle = itertools.cycle(self.replicas)
+        self._recent_writers = TTLCache(maxsize=100_000, ttl=sticky_seconds)
+
+    @staticmethod
+    def _client_key(request: Request):
+        # Behind a proxy without CLIENT_IP_HEADER every client shares one
+        # address, so the address is only a last resort.
+        return request.headers.get('authorization') or client_ip(request)
+
+    def _has_read_primary_cookie(self, request: Request):
+        token = request.cookies.get(READ_PRIMARY_COOKIE)
+        if not token:
+            return False
+        try:
+            claims = decode(
+                token, self.secret_key, algorithms=[self.algorithm]
+            )
+        except PyJWTError:
+            return False
+        return claims.get('read_primary') is True
+
+    def _mark_written(self, request: Request):
+        if self.sticky_seconds <= 0:
+            return
+
+        self._recent_writers.set(self._client_key(request), True)
+        token = encode(
+            {
+                'read_primary': True,
+                'exp': int(time.time() + self.sticky_seconds),
+            },
+            self.secret_key,
+            algorithm=self.algorithm,
+        )
+        secure = '; Secure' if request.url.scheme == 'https' else ''
+        request.state.read_primary_cookie = (
+            f'{READ_PRIMARY_COOKIE}={token}; '
+            f'Max-Age={math.ceil(self.sticky_seconds)}; Path=/; HttpOnly; '
+            f'SameSite=Lax{secure}'
+        )
+
+    def read_engine(self, request: Request):
+        if (
+            not self.replicas
+            or request.method not in SAFE_METHODS
+            or self._has_read_primary_cookie(request)
+            or self._recent_writers.get(self._client_key(request))
+        ):
+            return self.primary
+        return next(self._replica_cycle)
+
+    async def _primary_session(self, request: Request):
+        shared = getattr(request.state, 'primary_session', None)
+        if shared is not None:
+            yield shared
+            return
+
+        async with AsyncSession(
+            self.primary, expire_on_commit=False
+        ) as session:
+            if request.method not in SAFE_METHODS:
+                event.listen(
+                    session.sync_session,
+                    'after_commit',
+                    lambda _: self._mark_written(request),
+                )
+            request.state.primary_session = session
+            yield session
+
+    async def write_session(self, request: Request):
+        async for session in self._primary_session(request):
+            yield session
+
+    async def read_session(self, request: Request):
+        engine = self.read_engine(request)
+        if engine is self.primary:
+            async for session in self._primary_session(request):
+                yield session
+            return
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+
+class ReadYourWritesMiddleware:
+    """Sets the cookie :class:`SessionRouter` issues when a write commits."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message['type'] == 'http.response.start':
+                cookie = scope.get('state', {}).get('read_primary_cookie')
+                if cookie:
+                    MutableHeaders(scope=message).append('set-cookie', cookie)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
+
+
+engine = enforce_foreign_keys(
+    create_async_engine(
+        settings.DATABASE_URL,
+        **engine_options(settings.DATABASE_URL, settings),
+    )
+)
+replica_engines = [
+    create_async_engine(url, **engine_options(url, settings))
+    for url in settings.DATABASE_REPLICA_URLS
+]
+pool_monitor = PoolMonitor()
+pool_monitor.watch(engine)
+session_router = SessionRouter(
+    engine,
+    replica_engines,
+    sticky_seconds=settings.DATABASE_READ_YOUR_WRITES_SECONDS,
+    secret_key=settings.SECRET_KEY,
+    algorithm=settings.ALGORITHM,
+)
+
+
+async def get_session(request: Request):  # pragma: no cover
+    async for session in session_router.write_session(request):
         yield session
+
+
+async def get_read_session(request: Request):  # pragma: no cover
+    """Session for read-only routes, on a replica when one is configured."""
+    async for session in session_router.read_session(request):
+        yield session
+
+
+def dialect_insert(session: AsyncSession, model):
+    """Dialect specific INSERT, needed for ON CONFLICT clauses."""
+    if session.bind.dialect.name == 'sqlite':
+        return sqlite.insert(model)
+    return postgresql.insert(model)
@@ -0,0 +1,34 @@
+import hashlib
+from http import HTTPStatus
+
+from fastapi.responses import Response
+
+
+def weak_etag(*parts) -> str:
+    """Weak ETag for a representation identified by ``parts``.
+
+    Parts are cheap stand-ins for the body (ids, row counts, last update
+    times), so equal tags mean an equivalent body, not an identical one.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of ``etag`` against an If-None-Match header."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+
+    opaque_tag = etag.removeprefix('W/')
+    return any(
+        candidate.strip().removeprefix('W/') == opaque_tag
+        for candidate in if_none_match.split(',')
+    )
+
+
+def not_modified(etag: str):
+    return Response(
+        status_code=HTTPStatus.NOT_MODIFIED, headers={'ETag': etag}
+    )
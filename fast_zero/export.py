@@ -0,0 +1,60 @@
+import csv
+import io
+import json
+from datetime import datetime
+from enum import Enum
+
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def encode_ndjson(rows):
+    return ''.join(
+        json.dumps({key: _plain(value) for key, value in row._mapping.items()})
+        + '\n'
+        for row in rows
+    )
+
+
+def encode_csv(rows, header=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if header:
+        writer.writerow(header)
+    writer.writerows([_plain(value) for value in row] for row in rows)
+
+    return buffer.getvalue()
+
+
+async def stream_rows(engine, query, *, export_format, chunk_size):
+    """Encode ``query`` as ``export_format``, ``chunk_size`` rows at a time.
+
+    Rows come from a server-side cursor, so memory use stays flat no matter
+    how many rows the query returns.
+    """
+    # The request session is closed once the endpoint returns, before the
+    # body is streamed, so the export reads through its own connection.
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            query.execution_options(yield_per=chunk_size)
+        )
+
+        if export_format == 'csv':
+            yield encode_csv([], header=list(result.keys()))
+
+        async for rows in result.partitions():
+            if export_format == 'csv':
+                yield encode_csv(rows)
+            else:
+                yield encode_ndjson(rows)
@@ -0,0 +1,93 @@
+import asyncio
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fast_zero.metrics import PASSWORD_HASH_DURATION, PASSWORD_HASH_WAIT
+
+
+class HashingQueueFullError(Exception):
+    pass
+
+
+def _timed_call(func, *args):
+    started_at = time.monotonic()
+    result = func(*args)
+    return started_at, time.monotonic(), result
+
+
+class HashingPool:
+    """Runs password hashing off the event loop with bounded concurrency.
+
+    At most ``workers`` hashes run at once and at most ``max_queue`` wait
+    for a free worker; anything beyond that is rejected right away.
+    """
+
+    def __init__(self, *, executor='thread', workers=2, max_queue=32):
+        self.executor = executor
+        self.workers = workers
+        self.max_queue = max_queue
+        self._executor = None
+
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.run_seconds_total = 0.0
+
+    def _get_executor(self):
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.executor == 'process'
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def run(self, func, *args):
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise HashingQueueFullError
+
+        self.in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            (
+                started_at,
+                finished_at,
+                result,
+            ) = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), _timed_call, func, *args
+            )
+        finally:
+            self.in_flight -= 1
+
+        wait_seconds = max(0.0, started_at - submitted_at)
+        self.completed += 1
+        self.wait_seconds_total += wait_seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+        self.run_seconds_total += finished_at - started_at
+        PASSWORD_HASH_WAIT.observe(wait_seconds)
+        PASSWORD_HASH_DURATION.observe(finished_at - started_at)
+
+        return result
+
+    def stats(self):
+        return {
+            'executor': self.executor,
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': self.in_flight,
+            'queue_depth': max(0, self.in_flight - self.workers),
+            'completed': self.completed,
+            'rejected': self.rejected,
+            'wait_seconds_total': self.wait_seconds_total,
+            'wait_seconds_max': self.wait_seconds_max,
+            'run_seconds_total': self.run_seconds_total,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,273 @@
+"""In-process metrics rendered in the Prometheus text exposition format."""
+
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DEFAULT_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = [*zip(labelnames, values), *extra]
+    if not pairs:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('"', r'\"'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels[name] for name in self.labelnames)
+
+    def clear(self):
+        self._values.clear()
+
+    def samples(self):
+        for key, value in self._values.items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        lines.extend(
+            f'{name}{labels} {float(value)!r}'
+            for name, labels, value in self.samples()
+        )
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def dec(self, amount=1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets or DEFAULT_BUCKETS)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        counts, total = self._values.get(
+            key, ([0] * (len(self.buckets) + 1), 0.0)
+        )
+        counts[bisect_left(self.buckets, value)] += 1
+        self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self._key(labels), ((), 0.0))
+        return sum(counts)
+
+    def samples(self):
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip(
+                (*self.buckets, float('inf')), counts, strict=True
+            ):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                yield (
+                    f'{self.name}_bucket',
+                    _format_labels(self.labelnames, key, [('le', le)]),
+                    cumulative,
+                )
+            labels = _format_labels(self.labelnames, key)
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self.metrics) + '\n'
+
+
+registry = Registry()
+
+HTTP_REQUESTS = registry.register(
+    Counter(
+        'http_requests_total',
+        'HTTP requests by route and status code.',
+        ('method', 'route', 'status'),
+    )
+)
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        'http_request_duration_seconds',
+        'HTTP request latency by route.',
+        ('method', 'route'),
+    )
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.register(
+    Gauge('http_requests_in_flight', 'HTTP requests being served.')
+)
+DB_QUERIES = registry.register(
+    Counter('db_queries_total', 'SQL statements executed.', ('statement',))
+)
+DB_QUERY_DURATION = registry.register(
+    Histogram(
+        'db_query_duration_seconds',
+        'SQL statement execution time.',
+        ('statement',),
+    )
+)
+DB_POOL = registry.register(
+    Gauge(
+        'db_pool_connections',
+        'Connections in the database pool by state.',
+        ('state',),
+    )
+)
+DB_POOL_WAIT = registry.register(
+    Gauge(
+        'db_pool_wait_seconds_total',
+        'Total time spent waiting to check out a connection.',
+    )
+)
+PASSWORD_HASH_DURATION = registry.register(
+    Histogram(
+        'password_hash_duration_seconds',
+        'Time spent hashing or verifying a password in the worker pool.',
+        buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 1.0),
+    )
+)
+PASSWORD_HASH_WAIT = registry.register(
+    Histogram(
+        'password_hash_wait_seconds',
+        'Time a password hash waited for a free worker.',
+        buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+    )
+)
+
+RATE_LIMITED = registry.register(
+    Counter(
+        'rate_limited_requests_total',
+        'Requests rejected with 429 by a rate limit.',
+        ('limit',),
+    )
+)
+LOAD_SHED = registry.register(
+    Counter(
+        'load_shed_requests_total',
+        'Requests rejected with 503 by load shedding.',
+        ('reason',),
+    )
+)
+
+
+class MetricsMiddleware:
+    """Records latency, status and in-flight count of every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started_at = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            route = scope.get('route')
+            route_path = getattr(route, 'path', 'unmatched')
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started_at,
+                method=scope['method'],
+                route=route_path,
+            )
+            HTTP_REQUESTS.inc(
+                method=scope['method'], route=route_path, status=status
+            )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    context._query_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement else ''
+    DB_QUERIES.inc(statement=kind)
+    DB_QUERY_DURATION.observe(
+        time.perf_counter() - context._query_started_at, statement=kind
+    )
+
+
+def instrument_sqlalchemy():
+    """Time every SQL statement executed by any engine in the process."""
+    if not event.contains(
+        Engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+
+def update_pool_metrics(pool_stats):
+    for state in ('checked_out', 'idle', 'overflow'):
+        if state in pool_stats:
+            DB_POOL.set(pool_stats[state], state=state)
+    DB_POOL_WAIT.set(pool_stats['wait_seconds_total'])
@@ -0,0 +1,70 @@
+"""Upgrade the database to head, without loading alembic when already there.
+
+    python -m fast_zero.migrate
+
+Every boot of a scale-to-zero machine runs this before the server (see
+``python -m fast_zero.server --migrate``). In the common case the schema
+is current, and a single query against ``alembic_version`` replaces
+running the migration environment.
+"""
+
+import asyncio
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool
+
+from fast_zero.settings import get_settings
+
+ALEMBIC_INI = Path(__file__).parent.parent / 'alembic.ini'
+
+
+def _read_heads(connection):
+    return set(MigrationContext.configure(connection).get_current_heads())
+
+
+async def database_heads(url):
+    engine = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with engine.connect() as conn:
+            return await conn.run_sync(_read_heads)
+    finally:
+        await engine.dispose()
+
+
+def script_heads(config):
+    return set(ScriptDirectory.from_config(config).get_heads())
+
+
+def migrate(config, url):
+    """Upgrade to head unless already there; return whether it ran."""
+    if asyncio.run(database_heads(url)) == script_heads(config):
+        return False
+
+    command.upgrade(config, 'head')
+
+    return True
+
+
+def alembic_config():
+    config = Config(ALEMBIC_INI)
+    config.set_main_option(
+        'script_location', str(ALEMBIC_INI.parent / 'migrations')
+    )
+
+    return config
+
+
+def main():
+    if migrate(alembic_config(), get_settings().DATABASE_URL):
+        print('Database upgraded to head')
+    else:
+        print('Database already at head, skipping migrations')
+
+
+if __name__ == '__main__':
+    main()
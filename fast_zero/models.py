@@ -1,7 +1,7 @@
 from datetime import datetime
 from enum import Enum
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import DDL, ForeignKey, Index, event, func
 from sqlalchemy.orm import Mapped, mapped_column, registry, relationship
 
 table_registry = registry()
@@ -30,7 +30,9 @@ class User:
     todos: Mapped[list['Todo']] = relationship(
         init=False,
         cascade='all, delete-orphan',
-        lazy='selectin',
+        lazy='raise',
+        # ON DELETE CASCADE removes them, without loading a single one.
+        passive_deletes=True,
     )
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -43,13 +45,23 @@ class User:
 @table_registry.mapped_as_dataclass
 class Todo:
     __tablename__ = 'todos'
+    __table_args__ = (
+        Index('ix_todos_user_id_id', 'user_id', 'id'),
+        Index('ix_todos_user_id_state_id', 'user_id', 'state', 'id'),
+        Index('ix_todos_user_id_updated_at_id', 'user_id', 'updated_at', 'id'),
+    )
+    # Fetch server generated columns with INSERT ... RETURNING instead of
+    # a refresh after the flush.
+    __mapper_args__ = {'eager_defaults': True}
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     title: Mapped[str]
     description: Mapped[str]
     state: Mapped[TodoState]
 
-    user_id: Mapped[int] = mapped_column(ForeignKey('users.id'))
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE')
+    )
 
     created_at: Mapped[datetime] = mapped_column(
         init=False, server_default=func.now()
@@ -57,3 +69,75 @@ class Todo:
     updated_at: Mapped[datetime] = mapped_column(
         init=False, onupdate=func.now(), server_default=func.now()
     )
+
+
+@table_registry.mapped_as_dataclass
+class TodoCounter:
+    """Number of todos a user has in each state, see fast_zero.stats."""
+
+    __tablename__ = 'todo_counters'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    state: Mapped[TodoState] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+@table_registry.mapped_as_dataclass
+class TodoVersion:
+    """Bumped by every change to a user's todos, for the list ETag."""
+
+    __tablename__ = 'todo_versions'
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey('users.id', ondelete='CASCADE'), primary_key=True
+    )
+    version: Mapped[int] = mapped_column(default=0)
+
+
+# Search indexes are dialect specific, so they are emitted as DDL next to the
+# table instead of being declared as Index objects: trigram and full-text GIN
+# indexes on Postgres, an external content FTS5 table kept in sync by
+# triggers on SQLite. See fast_zero.search for the queries that use them.
+for statement in (
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE INDEX ix_todos_title_trgm ON todos USING gin (title gin_trgm_ops)',
+    'CREATE INDEX ix_todos_description_trgm '
+    'ON todos USING gin (description gin_trgm_ops)',
+    'CREATE INDEX ix_todos_search ON todos '
+    "USING gin (to_tsvector('simple', title || ' ' || description))",
+):
+    event.listen(
+        Todo.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='postgresql'),
+    )
+
+for statement in (
+    'CREATE VIRTUAL TABLE todos_fts USING fts5('
+    "title, description, content='todos', content_rowid='id')",
+    'CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN '
+    'INSERT INTO todos_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+    'CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN '
+    'INSERT INTO todos_fts(todos_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    'CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description '
+    'ON todos BEGIN '
+    'INSERT INTO todos_fts(todos_fts, rowid, title, description) '
+    "VALUES ('delete', old.id, old.title, old.description); "
+    'INSERT INTO todos_fts(rowid, title, description) '
+    'VALUES (new.id, new.title, new.description); END',
+):
+    event.listen(
+        Todo.__table__,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite'),
+    )
+
+event.listen(
+    Todo.__table__,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS todos_fts').execute_if(dialect='sqlite'),
+)
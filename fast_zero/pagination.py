@@ -0,0 +1,109 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, String, tuple_, type_coerce
+
+from fast_zero.schemas import FilterPage
+
+
+def encode_cursor(columns, row):
+    payload = {
+        'k': [column.key for column in columns],
+        'v': [_dump_value(getattr(row, column.key)) for column in columns],
+    }
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(columns, cursor: str):
+    invalid_cursor = HTTPException(
+        status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor'
+    )
+
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        keys, values = payload['k'], payload['v']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise invalid_cursor
+
+    if keys != [column.key for column in columns]:
+        raise invalid_cursor
+
+    try:
+        return [
+            _load_value(column, value)
+            for column, value in zip(columns, values, strict=True)
+        ]
+    except (TypeError, ValueError):
+        raise invalid_cursor
+
+
+def keyset_columns(columns, dialect_name: str):
+    """The ``columns`` to order a keyset page by, as ``dialect_name`` needs.
+
+    SQLite keeps datetimes as text, and ``func.now()`` writes them without
+    the fractional seconds SQLAlchemy renders for a bound datetime. A
+    datetime column is read and compared as that stored text instead, so
+    a cursor never skips rows written in the same second. Select these
+    columns along with the page so :func:`split_page` can read them.
+    """
+    if dialect_name != 'sqlite':
+        return tuple(columns)
+
+    return tuple(
+        type_coerce(column, String).label(f'{column.key}_text')
+        if isinstance(column.type, DateTime)
+        else column
+        for column in columns
+    )
+
+
+def paginate(query, columns, page: FilterPage):
+    """Order ``query`` by ``columns`` and select one page of it.
+
+    With a cursor the page starts right after the row it points to (keyset
+    pagination); otherwise ``offset`` is used. One extra row is fetched so
+    :func:`split_page` can tell whether there is a next page.
+    """
+    query = query.order_by(*columns)
+
+    if page.cursor:
+        values = decode_cursor(columns, page.cursor)
+        query = query.where(tuple_(*columns) > tuple_(*values))
+    else:
+        query = query.offset(page.offset)
+
+    return query.limit(page.limit + 1)
+
+
+def split_page(rows, columns, page: FilterPage):
+    if len(rows) <= page.limit:
+        return rows, None
+
+    rows = rows[: page.limit]
+    if not rows:
+        return rows, None
+
+    return rows, encode_cursor(columns, rows[-1])
+
+
+def _dump_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column, value):
+    python_type = column.type.python_type
+
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if not isinstance(value, python_type) or isinstance(value, bool):
+        raise TypeError(value)
+    return value
@@ -0,0 +1,48 @@
+import json
+from datetime import datetime
+from enum import Enum
+from typing import override
+
+from fastapi.responses import Response
+
+from fast_zero.tracing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def dumps(content) -> bytes:
+    """Encode plain dicts/lists (datetimes and enums included) to JSON.
+
+    Uses orjson when it is installed and falls back to the standard library.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(
+        content, default=_default, separators=(',', ':'), ensure_ascii=False
+    ).encode()
+
+
+class JSONBytesResponse(Response):
+    """JSON response for content that is already plain data.
+
+    Endpoints returning it skip response model validation, so they must build
+    exactly the documented shape themselves.
+    """
+
+    media_type = 'application/json'
+
+    @override
+    def render(self, content) -> bytes:
+        with span('render'):
+            return dumps(content)
@@ -3,16 +3,18 @@ from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from fast_zero.admission import limit_login
 from fast_zero.database import get_session
 from fast_zero.models import User
 from fast_zero.schemas import Token
 from fast_zero.security import (
+    Principal,
     create_access_token,
     get_current_user,
-    verify_password,
+    verify_and_update_password_async,
 )
 
 OAuth2Form = Annotated[OAuth2PasswordRequestForm, Depends()]
@@ -22,7 +24,9 @@ Session = Annotated[AsyncSession, Depends(get_session)]
 router = APIRouter(prefix='/auth', tags=['auth'])
 
 
-@router.post('/token', response_model=Token)
+@router.post(
+    '/token', response_model=Token, dependencies=[Depends(limit_login)]
+)
 async def login_for_access_token(form_data: OAuth2Form, session: Session):
     user = await session.scalar(
         select(User).where(User.email == form_data.username)
@@ -34,21 +38,37 @@ async def login_for_access_token(form_data: OAuth2Form, session: Session):
             detail='Incorrect email or password',
         )
 
-    if not verify_password(form_data.password, user.password):
+    valid, updated_hash = await verify_and_update_password_async(
+        form_data.password, user.password
+    )
+
+    if not valid:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='Incorrect email or password',
         )
 
-    access_token = create_access_token(data={'sub': user.email})
+    if updated_hash:
+        # The stored hash predates the current argon2 parameters. Only
+        # replace the hash we verified: if the password changed meanwhile,
+        # the row no longer matches and the new password is kept.
+        await session.execute(
+            update(User)
+            .where(User.id == user.id, User.password == user.password)
+            .values(password=updated_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+
+    access_token = create_access_token(data={'sub': str(user.id)})
 
     return {'access_token': access_token, 'token_type': 'bearer'}
 
 
 @router.post('/refresh_token', response_model=Token)
 def refresh_access_token(
-    user: User = Depends(get_current_user),
+    user: Principal = Depends(get_current_user),
 ):
-    new_access_token = create_access_token(data={'sub': user.email})
+    new_access_token = create_access_token(data={'sub': str(user.id)})
 
     return {'access_token': new_access_token, 'token_type': 'bearer'}
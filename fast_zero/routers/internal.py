@@ -0,0 +1,29 @@
+from fastapi import APIRouter
+
+from fast_zero.database import engine, pool_monitor
+from fast_zero.security import hashing_pool, principal_cache
+from fast_zero.startup import startup_timer
+
+router = APIRouter(
+    prefix='/internal', tags=['internal'], include_in_schema=False
+)
+
+
+@router.get('/hashing')
+def read_hashing_stats():
+    return hashing_pool.stats()
+
+
+@router.get('/principal-cache')
+def read_principal_cache_stats():
+    return principal_cache.stats()
+
+
+@router.get('/pool')
+def read_pool_stats():
+    return pool_monitor.stats(engine)
+
+
+@router.get('/startup')
+def read_startup_stats():
+    return startup_timer.stats()
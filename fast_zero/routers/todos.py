@@ -1,29 +1,55 @@
+from collections import Counter
 from http import HTTPStatus
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
-from fast_zero.models import Todo, User
+from fast_zero.database import get_read_session, get_session
+from fast_zero.etags import etag_matches, not_modified, weak_etag
+from fast_zero.export import EXPORT_FORMATS, stream_rows
+from fast_zero.models import Todo, TodoVersion
+from fast_zero.pagination import keyset_columns, paginate, split_page
+from fast_zero.responses import JSONBytesResponse
 from fast_zero.schemas import (
     FilterTodo,
     Message,
+    TodoBatch,
+    TodoBatchResponse,
     TodoList,
     TodoPublic,
     TodoSchema,
+    TodoStats,
     TodoUpdate,
 )
-from fast_zero.security import get_current_user
+from fast_zero.search import search_todos
+from fast_zero.security import Principal, get_current_user
+from fast_zero.settings import get_settings
+from fast_zero.stats import adjust_counters, bump_todo_version, todo_stats
+
+settings = get_settings()
 
 router = APIRouter()
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 router = APIRouter(prefix='/todos', tags=['todos'])
 
+# Columns of TodoPublic, read as plain rows by the list endpoint.
+TODO_PUBLIC_COLUMNS = (
+    Todo.id,
+    Todo.title,
+    Todo.description,
+    Todo.state,
+    Todo.created_at,
+    Todo.updated_at,
+)
+TODO_PUBLIC_KEYS = tuple(column.key for column in TODO_PUBLIC_COLUMNS)
+
 
 @router.post('/', response_model=TodoPublic)
 async def create_todo(
@@ -38,19 +64,53 @@ async def create_todo(
         user_id=user.id,
     )
     session.add(db_todo)
+    await adjust_counters(session, user.id, Counter({todo.state: 1}))
+    await bump_todo_version(session, user.id)
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
 
 
+async def _todos_etag(session, user_id: int, todo_filter: FilterTodo):
+    # Every change made through this router bumps the user's version in its
+    # own transaction; updated_at only has one-second resolution on SQLite.
+    # The count and latest updated_at, from the (user_id, ...) indexes, also
+    # catch rows written outside the API.
+    version = (
+        select(TodoVersion.version)
+        .where(TodoVersion.user_id == user_id)
+        .scalar_subquery()
+    )
+    count, last_updated_at, version = (
+        await session.execute(
+            select(func.count(), func.max(Todo.updated_at), version).where(
+                Todo.user_id == user_id
+            )
+        )
+    ).one()
+
+    return weak_etag(
+        'todos',
+        user_id,
+        version,
+        count,
+        last_updated_at,
+        todo_filter.model_dump_json(),
+    )
+
+
 @router.get('/', response_model=TodoList)
 async def list_todos(
-    session: Session,
+    session: ReadSession,
     user: CurrentUser,
     todo_filter: Annotated[FilterTodo, Query()],
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    query = select(Todo).where(Todo.user_id == user.id)
+    etag = await _todos_etag(session, user.id, todo_filter)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    query = select(*TODO_PUBLIC_COLUMNS).where(Todo.user_id == user.id)
 
     if todo_filter.title:
         query = query.filter(Todo.title.contains(todo_filter.title))
@@ -63,20 +123,117 @@ async def list_todos(
     if todo_filter.state:
         query = query.filter(Todo.state == todo_filter.state)
 
-    query = await session.scalars(
-        query.offset(todo_filter.offset).limit(todo_filter.limit)
+    if todo_filter.q:
+        if todo_filter.cursor:
+            raise HTTPException(
+                status_code=HTTPStatus.BAD_REQUEST,
+                detail='Cursor pagination is not supported with q',
+            )
+
+        query = search_todos(query, todo_filter.q, session.bind.dialect.name)
+        rows = await session.execute(
+            query.offset(todo_filter.offset).limit(todo_filter.limit)
+        )
+
+        return JSONBytesResponse(
+            {'todos': [row._asdict() for row in rows], 'next_cursor': None},
+            headers={'ETag': etag},
+        )
+
+    order_columns = keyset_columns(
+        (Todo.updated_at, Todo.id)
+        if todo_filter.order_by == 'updated_at'
+        else (Todo.id,),
+        session.bind.dialect.name,
+    )
+    # SQLite's text sort keys (see keyset_columns) are read after the public
+    # columns and left out of the response.
+    query = query.add_columns(
+        *(
+            column
+            for column in order_columns
+            if column.key not in TODO_PUBLIC_KEYS
+        )
+    )
+    rows = await session.execute(paginate(query, order_columns, todo_filter))
+    todos, next_cursor = split_page(rows.all(), order_columns, todo_filter)
+
+    return JSONBytesResponse(
+        {
+            'todos': [
+                dict(zip(TODO_PUBLIC_KEYS, row, strict=False)) for row in todos
+            ],
+            'next_cursor': next_cursor,
+        },
+        headers={'ETag': etag},
+    )
+
+
+@router.get('/export', response_class=StreamingResponse)
+async def export_todos(
+    session: Session,
+    user: CurrentUser,
+    export_format: Annotated[
+        Literal['ndjson', 'csv'], Query(alias='format')
+    ] = 'ndjson',
+):
+    query = (
+        select(
+            Todo.id,
+            Todo.title,
+            Todo.description,
+            Todo.state,
+            Todo.created_at,
+            Todo.updated_at,
+        )
+        .where(Todo.user_id == user.id)
+        .order_by(Todo.id)
+    )
+
+    return StreamingResponse(
+        stream_rows(
+            session.bind,
+            query,
+            export_format=export_format,
+            chunk_size=settings.TODO_EXPORT_CHUNK_SIZE,
+        ),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={
+            'Content-Disposition': (
+                f'attachment; filename="todos.{export_format}"'
+            )
+        },
     )
-    todos = query.all()
 
-    return {'todos': todos}
+
+@router.get('/stats', response_model=TodoStats)
+async def read_todo_stats(session: Session, user: CurrentUser):
+    return await todo_stats(session, user.id)
 
 
 @router.patch('/{todo_id}', response_model=TodoPublic)
 async def patch_todo(
     todo_id: int, session: Session, user: CurrentUser, todo: TodoUpdate
 ):
+    values = todo.model_dump(exclude_unset=True)
+    old_state = None
+    if 'state' in values:
+        old_state = await session.scalar(
+            select(Todo.state)
+            .where(Todo.user_id == user.id, Todo.id == todo_id)
+            .with_for_update()
+        )
+
+    query = (
+        update(Todo).values(**values).returning(Todo)
+        if values
+        else select(Todo)
+    )
+
     db_todo = await session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
+        query.where(
+            Todo.user_id == user.id, Todo.id == todo_id
+        ).execution_options(populate_existing=True)
     )
 
     if not db_todo:
@@ -84,28 +241,167 @@ async def patch_todo(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found.'
         )
 
-    for key, value in todo.model_dump(exclude_unset=True).items():
-        setattr(db_todo, key, value)
-
-    session.add(db_todo)
+    if old_state is not None and old_state != db_todo.state:
+        await adjust_counters(
+            session, user.id, Counter({old_state: -1, db_todo.state: 1})
+        )
+    if values:
+        await bump_todo_version(session, user.id)
     await session.commit()
-    await session.refresh(db_todo)
 
     return db_todo
 
 
 @router.delete('/{todo_id}', response_model=Message)
 async def delete_todo(todo_id: int, session: Session, user: CurrentUser):
-    todo = await session.scalar(
-        select(Todo).where(Todo.user_id == user.id, Todo.id == todo_id)
+    deleted_state = await session.scalar(
+        delete(Todo)
+        .where(Todo.user_id == user.id, Todo.id == todo_id)
+        .returning(Todo.state)
     )
 
-    if not todo:
+    if not deleted_state:
         raise HTTPException(
             status_code=HTTPStatus.NOT_FOUND, detail='Task not found.'
         )
 
-    await session.delete(todo)
+    await adjust_counters(session, user.id, Counter({deleted_state: -1}))
+    await bump_todo_version(session, user.id)
     await session.commit()
 
     return {'message': 'Task has been deleted successfully.'}
+
+
+@router.post('/batch', response_model=TodoBatchResponse)
+async def batch_todos(batch: TodoBatch, user: CurrentUser, session: Session):
+    if len(batch.operations) > settings.TODO_BATCH_MAX_OPERATIONS:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail=(
+                'Too many operations, the limit is '
+                f'{settings.TODO_BATCH_MAX_OPERATIONS}.'
+            ),
+        )
+
+    operations = list(enumerate(batch.operations))
+    results = await _check_batch_targets(session, user, operations)
+
+    if batch.mode == 'atomic' and any(results):
+        not_applied = {
+            'status': HTTPStatus.FAILED_DEPENDENCY,
+            'detail': 'Not applied.',
+        }
+        return {
+            'applied': False,
+            'results': [result or not_applied for result in results],
+        }
+
+    pending = [(i, op) for i, op in operations if results[i] is None]
+    await _apply_batch(session, user, pending, results)
+    if pending:
+        await bump_todo_version(session, user.id)
+    await session.commit()
+
+    return {'applied': True, 'results': results}
+
+
+async def _check_batch_targets(session, user, operations):
+    results = [None] * len(operations)
+    targeted = [(i, op) for i, op in operations if op.op != 'create']
+
+    seen_ids = set()
+    for i, op in targeted:
+        if op.id in seen_ids:
+            results[i] = {
+                'status': HTTPStatus.CONFLICT,
+                'detail': 'Duplicate operation for this task.',
+            }
+        seen_ids.add(op.id)
+
+    owned_ids = set()
+    if seen_ids:
+        owned_ids = set(
+            await session.scalars(
+                select(Todo.id).where(
+                    Todo.user_id == user.id, Todo.id.in_(seen_ids)
+                )
+            )
+        )
+    for i, op in targeted:
+        if results[i] is None and op.id not in owned_ids:
+            results[i] = {
+                'status': HTTPStatus.NOT_FOUND,
+                'detail': 'Task not found.',
+            }
+
+    return results
+
+
+async def _apply_batch(session, user, pending, results):
+    """Run each kind of operation as a single bulk statement."""
+    creates = [(i, op) for i, op in pending if op.op == 'create']
+    updates = [(i, op) for i, op in pending if op.op == 'update']
+    deletes = [(i, op) for i, op in pending if op.op == 'delete']
+    deltas = Counter(op.todo.state for _, op in creates)
+
+    if creates:
+        created = await session.scalars(
+            insert(Todo).returning(Todo, sort_by_parameter_order=True),
+            [
+                {**op.todo.model_dump(), 'user_id': user.id}
+                for _, op in creates
+            ],
+        )
+        for (i, _), todo in zip(creates, created.all(), strict=True):
+            results[i] = {'status': HTTPStatus.CREATED, 'todo': todo}
+
+    changes = [
+        {'id': op.id, **op.todo.model_dump(exclude_unset=True)}
+        for _, op in updates
+        if op.todo.model_fields_set
+    ]
+    state_changes = [change['id'] for change in changes if 'state' in change]
+    if state_changes:
+        # Locked like patch_todo, so a racing change cannot be counted twice.
+        deltas.subtract(
+            await session.scalars(
+                select(Todo.state)
+                .where(Todo.user_id == user.id, Todo.id.in_(state_changes))
+                .with_for_update()
+            )
+        )
+        deltas.update(
+            change['state'] for change in changes if 'state' in change
+        )
+
+    if changes:
+        await session.execute(update(Todo), changes)
+
+    if updates:
+        updated = await session.scalars(
+            select(Todo)
+            .where(Todo.id.in_([op.id for _, op in updates]))
+            .execution_options(populate_existing=True)
+        )
+        todos_by_id = {todo.id: todo for todo in updated}
+        for i, op in updates:
+            results[i] = {'status': HTTPStatus.OK, 'todo': todos_by_id[op.id]}
+
+    if deletes:
+        deltas.subtract(
+            await session.scalars(
+                delete(Todo)
+                .where(
+                    Todo.user_id == user.id,
+                    Todo.id.in_([op.id for _, op in deletes]),
+                )
+                .returning(Todo.state)
+            )
+        )
+        for i, _ in deletes:
+            results[i] = {
+                'status': HTTPStatus.OK,
+                'detail': 'Task has been deleted successfully.',
+            }
+
+    await adjust_counters(session, user.id, deltas)
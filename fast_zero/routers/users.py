@@ -1,13 +1,21 @@
 from http import HTTPStatus
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from sqlalchemy import delete, or_, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
+from fast_zero.admission import limit_signup
+from fast_zero.database import (
+    dialect_insert,
+    get_read_session,
+    get_session,
+)
+from fast_zero.etags import etag_matches, not_modified, weak_etag
 from fast_zero.models import User
+from fast_zero.pagination import paginate, split_page
+from fast_zero.responses import JSONBytesResponse
 from fast_zero.schemas import (
     FilterPage,
     Message,
@@ -16,58 +24,99 @@ from fast_zero.schemas import (
     UserSchema,
 )
 from fast_zero.security import (
+    Principal,
     get_current_user,
-    get_password_hash,
+    get_password_hash_async,
+    invalidate_principal,
 )
 
 Session = Annotated[AsyncSession, Depends(get_session)]
-CurrentUser = Annotated[User, Depends(get_current_user)]
+ReadSession = Annotated[AsyncSession, Depends(get_read_session)]
+CurrentUser = Annotated[Principal, Depends(get_current_user)]
 
 router = APIRouter(prefix='/users', tags=['users'])
 
 
-@router.post('/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
+async def _get_user(session: AsyncSession, user_id: int):
+    user = await session.get(User, user_id)
+
+    if not user:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='User not found',
+        )
+
+    return user
+
+
+@router.post(
+    '/',
+    status_code=HTTPStatus.CREATED,
+    response_model=UserPublic,
+    dependencies=[Depends(limit_signup)],
+)
 async def create_user(user: UserSchema, session: Session):
+    # Hash before touching the database, so no connection or row lock is
+    # held while waiting for argon2. The unique constraints then decide
+    # whether the account can be created, so concurrent signups cannot
+    # race; the signup rate limit bounds the hashes wasted on conflicts.
+    hashed_password = await get_password_hash_async(user.password)
     db_user = await session.scalar(
-        select(User).where(
-            (User.username == user.username) | (User.email == user.email)
+        dialect_insert(session, User)
+        .values(
+            username=user.username,
+            email=user.email,
+            password=hashed_password,
         )
+        .on_conflict_do_nothing()
+        .returning(User)
     )
 
-    if db_user:
-        if db_user.username == user.username:
-            raise HTTPException(
-                status_code=HTTPStatus.BAD_REQUEST,
-                detail='Username already exists',
+    if not db_user:
+        taken = (
+            await session.execute(
+                select(User.username, User.email).where(
+                    or_(
+                        User.username == user.username,
+                        User.email == user.email,
+                    )
+                )
             )
-        elif db_user.email == user.email:
+        ).all()
+
+        if any(username == user.username for username, _ in taken):
             raise HTTPException(
                 status_code=HTTPStatus.BAD_REQUEST,
-                detail='Email already exists',
+                detail='Username already exists',
             )
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST,
+            detail='Email already exists',
+        )
 
-    hashed_password = get_password_hash(user.password)
-
-    db_user = User(
-        username=user.username, password=hashed_password, email=user.email
-    )
-    session.add(db_user)
     await session.commit()
-    await session.refresh(db_user)
 
     return db_user
 
 
 @router.get('/', response_model=UserList)
 async def read_users(
-    session: Session, filter_users: Annotated[FilterPage, Query()]
+    session: ReadSession, filter_users: Annotated[FilterPage, Query()]
 ):
-    query = await session.scalars(
-        select(User).offset(filter_users.offset).limit(filter_users.limit)
+    order_columns = (User.id,)
+    rows = await session.execute(
+        paginate(
+            select(User.id, User.username, User.email),
+            order_columns,
+            filter_users,
+        )
     )
-    users = query.all()
+    users, next_cursor = split_page(rows.all(), order_columns, filter_users)
 
-    return {'users': users}
+    return JSONBytesResponse({
+        'users': [row._asdict() for row in users],
+        'next_cursor': next_cursor,
+    })
 
 
 @router.put('/{user_id}', response_model=UserPublic)
@@ -82,35 +131,54 @@ async def update_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
+    db_user = await _get_user(session, user_id)
+    hashed_password = await get_password_hash_async(user.password)
+
     try:
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-        current_user.email = user.email
+        db_user.username = user.username
+        db_user.password = hashed_password
+        db_user.email = user.email
         await session.commit()
-        await session.refresh(current_user)
-
-        return current_user
+        await session.refresh(db_user)
     except IntegrityError:
         raise HTTPException(
             status_code=HTTPStatus.CONFLICT,
             detail='Username or Email already exists',
         )
 
+    invalidate_principal(user_id)
+
+    return db_user
+
 
 @router.get('/{user_id}', response_model=UserPublic)
 async def get_user_id(
     user_id: int,
-    session: Session,
+    session: ReadSession,
+    if_none_match: Annotated[str | None, Header()] = None,
 ):
-    user = await session.scalar(select(User).where(User.id == user_id))
+    row = (
+        await session.execute(
+            select(User.id, User.username, User.email, User.updated_at).where(
+                User.id == user_id
+            )
+        )
+    ).one_or_none()
 
-    if not user:
+    if not row:
         raise HTTPException(
             status_code=HTTPStatus.BAD_REQUEST,
             detail='User not found',
         )
 
-    return user
+    etag = weak_etag('user', *row)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+
+    return JSONBytesResponse(
+        {'id': row.id, 'username': row.username, 'email': row.email},
+        headers={'ETag': etag},
+    )
 
 
 @router.delete('/{user_id}', response_model=Message)
@@ -124,7 +192,14 @@ async def delete_user(
             status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions'
         )
 
-    await session.delete(current_user)
+    # Todos and counters go with it through ON DELETE CASCADE.
+    result = await session.execute(delete(User).where(User.id == user_id))
+    if not result.rowcount:
+        raise HTTPException(
+            status_code=HTTPStatus.BAD_REQUEST, detail='User not found'
+        )
+
     await session.commit()
+    invalidate_principal(user_id)
 
     return {'message': 'User deleted'}
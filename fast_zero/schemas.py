@@ -1,6 +1,13 @@
 from datetime import datetime
+from typing import Annotated, Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    EmailStr,
+    Field,
+    StringConstraints,
+)
 
 from fast_zero.models import TodoState
 
@@ -28,6 +35,7 @@ class UserDB(UserSchema):
 
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
 
 
 class Token(BaseModel):
@@ -36,8 +44,9 @@ class Token(BaseModel):
 
 
 class FilterPage(BaseModel):
-    offset: int = 0
-    limit: int = 100
+    offset: int = Field(0, ge=0)
+    limit: int = Field(100, ge=1)
+    cursor: str | None = None
 
 
 class TodoSchema(BaseModel):
@@ -54,15 +63,61 @@ class TodoPublic(TodoSchema):
 
 class TodoList(BaseModel):
     todos: list[TodoPublic]
+    next_cursor: str | None = None
+
+
+class TodoStats(BaseModel):
+    total: int
+    states: dict[TodoState, int]
 
 
 class FilterTodo(FilterPage):
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
+    # Blank after stripping means no search.
+    q: Annotated[str, StringConstraints(strip_whitespace=True)] | None = None
+    order_by: Literal['id', 'updated_at'] = 'id'
 
 
 class TodoUpdate(BaseModel):
     title: str | None = None
     description: str | None = None
     state: TodoState | None = None
+
+
+class TodoBatchCreate(BaseModel):
+    op: Literal['create']
+    todo: TodoSchema
+
+
+class TodoBatchUpdate(BaseModel):
+    op: Literal['update']
+    id: int
+    todo: TodoUpdate
+
+
+class TodoBatchDelete(BaseModel):
+    op: Literal['delete']
+    id: int
+
+
+class TodoBatch(BaseModel):
+    mode: Literal['atomic', 'best_effort'] = 'atomic'
+    operations: list[
+        Annotated[
+            TodoBatchCreate | TodoBatchUpdate | TodoBatchDelete,
+            Field(discriminator='op'),
+        ]
+    ]
+
+
+class TodoBatchResult(BaseModel):
+    status: int
+    todo: TodoPublic | None = None
+    detail: str | None = None
+
+
+class TodoBatchResponse(BaseModel):
+    applied: bool
+    results: list[TodoBatchResult]
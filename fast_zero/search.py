@@ -0,0 +1,47 @@
+from sqlalchemy import column, false, func, literal_column, or_, table
+
+from fast_zero.models import Todo
+
+todos_fts = table('todos_fts', column('rowid'))
+
+
+def search_todos(query, q: str, dialect_name: str):
+    """Restrict a todo query to rows matching ``q``, best match first.
+
+    Uses the full-text index on Postgres and the FTS5 table on SQLite (see
+    fast_zero.models); other backends fall back to a substring scan.
+    """
+    if dialect_name == 'postgresql':
+        vector = func.to_tsvector(
+            literal_column("'simple'"),
+            Todo.title + literal_column("' '") + Todo.description,
+        )
+        ts_query = func.plainto_tsquery(literal_column("'simple'"), q)
+
+        return query.where(vector.op('@@')(ts_query)).order_by(
+            func.ts_rank(vector, ts_query).desc(), Todo.id
+        )
+
+    if dialect_name == 'sqlite':
+        fts = literal_column('todos_fts')
+        match = _fts5_query(q)
+        # FTS5 rejects an empty MATCH; with no terms nothing matches.
+        if not match:
+            return query.where(false())
+
+        return (
+            query
+            .join(todos_fts, todos_fts.c.rowid == Todo.id)
+            .where(fts.op('MATCH')(match))
+            .order_by(func.bm25(fts), Todo.id)
+        )
+
+    return query.where(
+        or_(Todo.title.contains(q), Todo.description.contains(q))
+    ).order_by(Todo.id)
+
+
+def _fts5_query(q: str):
+    # Quote every term so user input is never parsed as FTS5 syntax.
+    terms = q.split()
+    return ' '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
@@ -1,3 +1,4 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
@@ -6,17 +7,46 @@ from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, ExpiredSignatureError, decode, encode
 from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
+from fast_zero.cache import TTLCache
+from fast_zero.database import get_read_session
+from fast_zero.hashing import HashingPool, HashingQueueFullError
 from fast_zero.models import User
-from fast_zero.settings import Settings
+from fast_zero.settings import get_settings
+from fast_zero.tracing import span
+
+settings = get_settings()
+
+pwd_context = PasswordHash((
+    Argon2Hasher(
+        time_cost=settings.PASSWORD_HASH_TIME_COST,
+        memory_cost=settings.PASSWORD_HASH_MEMORY_COST,
+        parallelism=settings.PASSWORD_HASH_PARALLELISM,
+    ),
+))
+hashing_pool = HashingPool(
+    executor=settings.PASSWORD_HASH_EXECUTOR,
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+)
 
-settings = Settings()
 
-pwd_context = PasswordHash.recommended()
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl='auth/token')
+@dataclass(frozen=True, slots=True)
+class Principal:
+    id: int
+    username: str
+    email: str
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate_where(lambda principal: principal.id == user_id)
 
 
 def create_access_token(data: dict):
@@ -39,10 +69,48 @@ def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str):
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+async def _run_in_hashing_pool(func, *args):
+    try:
+        return await hashing_pool.run(func, *args)
+    except HashingQueueFullError:
+        raise HTTPException(
+            status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+            detail='Server is busy, try again later',
+            headers={'Retry-After': '1'},
+        )
+
+
+async def get_password_hash_async(password: str):
+    return await _run_in_hashing_pool(get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await _run_in_hashing_pool(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+):
+    return await _run_in_hashing_pool(
+        verify_and_update_password, plain_password, hashed_password
+    )
+
+
 async def get_current_user(
-    session: AsyncSession = Depends(get_session),
+    session: AsyncSession = Depends(get_read_session),
     token: str = Depends(oauth2_scheme),
 ):
+    with span('auth'):
+        return await _authenticate(session, token)
+
+
+async def _authenticate(session: AsyncSession, token: str):
     credentials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
@@ -53,9 +121,9 @@ async def get_current_user(
         payload = decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        subject_email = payload.get('sub')
+        subject = payload.get('sub')
 
-        if not subject_email:
+        if not subject:
             raise credentials_exception
 
     except DecodeError:
@@ -64,11 +132,24 @@ async def get_current_user(
     except ExpiredSignatureError:
         raise credentials_exception
 
-    user = await session.scalar(
-        select(User).where(User.email == subject_email)
-    )
+    principal = principal_cache.get(subject)
+    if principal:
+        return principal
+
+    user = await _load_subject(session, subject)
 
     if not user:
         raise credentials_exception
 
-    return user
+    principal = Principal(id=user.id, username=user.username, email=user.email)
+    principal_cache.set(subject, principal)
+
+    return principal
+
+
+async def _load_subject(session: AsyncSession, subject: str):
+    if subject.isdigit():
+        return await session.get(User, int(subject))
+
+    # Tokens issued before subjects became user ids carry the email.
+    return await session.scalar(select(User).where(User.email == subject))
@@ -0,0 +1,89 @@
+"""Production entry point.
+
+    python -m fast_zero.server [--migrate]
+
+Runs uvicorn with one worker per available CPU (``SERVER_WORKERS``
+overrides it), on uvloop and httptools when they are installed. On
+SIGTERM workers stop accepting connections, finish in-flight requests for
+up to ``SERVER_GRACEFUL_SHUTDOWN`` seconds and run the app lifespan, which
+disposes the database engine.
+"""
+
+import argparse
+import importlib.util
+import math
+import os
+from pathlib import Path
+
+import uvicorn
+
+from fast_zero.app import app
+from fast_zero.migrate import alembic_config, migrate
+from fast_zero.settings import get_settings
+
+CGROUP_CPU_MAX = Path('/sys/fs/cgroup/cpu.max')
+
+
+def available_cpus():
+    if hasattr(os, 'sched_getaffinity'):
+        cpus = len(os.sched_getaffinity(0))
+    else:  # pragma: no cover
+        cpus = os.cpu_count() or 1
+
+    # Containers see every host CPU; the cgroup quota is what we may use.
+    try:
+        quota, period = CGROUP_CPU_MAX.read_text(encoding='utf-8').split()
+    except (OSError, ValueError):
+        return cpus
+
+    if quota == 'max':
+        return cpus
+
+    return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+
+
+def _installed(module):
+    return importlib.util.find_spec(module) is not None
+
+
+def server_options(settings):
+    workers = settings.SERVER_WORKERS or available_cpus()
+
+    return {
+        'host': settings.SERVER_HOST,
+        'port': settings.SERVER_PORT,
+        'workers': workers,
+        'loop': 'uvloop' if _installed('uvloop') else 'asyncio',
+        'http': 'httptools' if _installed('httptools') else 'h11',
+        'lifespan': 'on',
+        'proxy_headers': True,
+        # X-Forwarded-For is set by whoever sends it; only these peers may.
+        'forwarded_allow_ips': settings.SERVER_FORWARDED_ALLOW_IPS,
+        'timeout_graceful_shutdown': settings.SERVER_GRACEFUL_SHUTDOWN,
+    }
+
+
+def main():  # pragma: no cover
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--migrate',
+        action='store_true',
+        help='upgrade the database to head first, in this same process',
+    )
+    args = parser.parse_args()
+
+    settings = get_settings()
+    if args.migrate:
+        migrate(alembic_config(), settings.DATABASE_URL)
+
+    options = server_options(settings)
+
+    # The app is imported before the socket is bound, so a broken
+    # configuration fails here rather than in every worker. A single worker
+    # serves this instance; several workers each import it by name.
+    target = app if options['workers'] == 1 else 'fast_zero.app:app'
+    uvicorn.run(target, **options)
+
+
+if __name__ == '__main__':  # pragma: no cover
+    main()
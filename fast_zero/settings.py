@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -10,3 +12,54 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+
+    PASSWORD_HASH_EXECUTOR: str = 'thread'
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    PASSWORD_HASH_TIME_COST: int = 3
+    PASSWORD_HASH_MEMORY_COST: int = 65_536
+    PASSWORD_HASH_PARALLELISM: int = 4
+
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL: float = 60.0
+
+    TODO_BATCH_MAX_OPERATIONS: int = 500
+
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: float = 30.0
+    DATABASE_POOL_RECYCLE: int = -1
+    DATABASE_POOL_PRE_PING: bool = False
+    DATABASE_REPLICA_URLS: list[str] = []
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5.0
+
+    TODO_EXPORT_CHUNK_SIZE: int = 1_000
+    TODO_STATS_VERIFY_INTERVAL: float = 300.0
+
+    TRACING_ENABLED: bool = True
+    TRACE_FILE: str | None = None
+
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_GRACEFUL_SHUTDOWN: int = 30
+    SERVER_FORWARDED_ALLOW_IPS: str = '127.0.0.1'
+    CLIENT_IP_HEADER: str | None = None
+
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_IP_RATE: float = 1.0
+    RATE_LIMIT_LOGIN_IP_BURST: int = 20
+    RATE_LIMIT_LOGIN_ACCOUNT_RATE: float = 0.1
+    RATE_LIMIT_LOGIN_ACCOUNT_BURST: int = 5
+    RATE_LIMIT_SIGNUP_IP_RATE: float = 0.1
+    RATE_LIMIT_SIGNUP_IP_BURST: int = 10
+    LOAD_SHED_MAX_IN_FLIGHT: int = 256
+    LOAD_SHED_MAX_POOL_WAIT: float = 1.0
+
+    STARTUP_WARMUP: bool = True
+    BOOT_TIME: float | None = None
+
+
+@lru_cache
+def get_settings():
+    return Settings()
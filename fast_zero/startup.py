@@ -0,0 +1,116 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+from jwt import decode
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from fast_zero.security import (
+    create_access_token,
+    get_password_hash,
+    hashing_pool,
+    settings,
+)
+
+logger = logging.getLogger('uvicorn.error')
+
+
+def process_started_at():
+    """Wall-clock time this process was started, from /proc when we can."""
+    try:
+        stat = Path('/proc/self/stat').read_text(encoding='utf-8')
+        uptime = Path('/proc/uptime').read_text(encoding='utf-8')
+        # The command name may contain spaces; fields resume after ')'.
+        start_ticks = int(stat.rsplit(')', 1)[1].split()[19])
+        age = float(uptime.split()[0]) - start_ticks / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError):
+        return time.time()
+
+    return time.time() - max(age, 0.0)
+
+
+class StartupTimer:
+    """Seconds from boot to each startup milestone; the first mark wins.
+
+    ``started_at`` defaults to the process start; the entrypoint exports
+    ``BOOT_TIME`` so migrations run before the server are counted too.
+    """
+
+    def __init__(self, started_at=None, clock=time.time):
+        self.clock = clock
+        self.started_at = started_at or process_started_at()
+        self.marks = {}
+
+    def mark(self, name):
+        if name not in self.marks:
+            self.marks[name] = self.clock() - self.started_at
+            logger.info('startup %s', json.dumps({name: self.marks[name]}))
+
+    def stats(self):
+        return {
+            'started_at': self.started_at,
+            **{f'{name}_seconds': value for name, value in self.marks.items()},
+        }
+
+
+startup_timer = StartupTimer(settings.BOOT_TIME)
+
+
+class FirstResponseMiddleware:
+    """Marks ``first_response`` when the first HTTP response starts."""
+
+    def __init__(self, app, timer=startup_timer):
+        self.app = app
+        self.timer = timer
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or 'first_response' in self.timer.marks:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                self.timer.mark('first_response')
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+async def _ping(engine):
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+
+
+async def warm_up(engine):
+    """Pay the first-use costs of the database and JWT paths.
+
+    Fills the connection pool and round-trips a token. A database that is
+    not reachable yet is logged and left to the first request, as without
+    warm-up.
+    """
+    connections = engine.pool.size() if hasattr(engine.pool, 'size') else 1
+    try:
+        await asyncio.gather(*(_ping(engine) for _ in range(connections)))
+    except (SQLAlchemyError, OSError):
+        logger.warning('Database warm-up failed', exc_info=True)
+
+    decode(
+        create_access_token(data={'sub': '0'}),
+        settings.SECRET_KEY,
+        algorithms=[settings.ALGORITHM],
+    )
+
+
+async def warm_up_hashing(timer=startup_timer):
+    """Start every hashing worker with one argon2 hash."""
+    await asyncio.gather(
+        *(
+            hashing_pool.run(get_password_hash, 'warm-up')
+            for _ in range(hashing_pool.workers)
+        )
+    )
+    timer.mark('hashing_warmed')
@@ -0,0 +1,119 @@
+from collections import Counter
+
+from sqlalchemy import func, select, update
+
+from fast_zero.cache import TTLCache
+from fast_zero.database import dialect_insert
+from fast_zero.models import Todo, TodoCounter, TodoState, TodoVersion
+from fast_zero.settings import get_settings
+
+settings = get_settings()
+
+# Users whose counters were compared with their todos recently. Outside
+# this window the next read recounts once and rebuilds on a mismatch, so
+# drift (bulk SQL, a missed code path) heals without a scan on every read.
+verified_counters = TTLCache(
+    maxsize=10_000, ttl=settings.TODO_STATS_VERIFY_INTERVAL
+)
+
+
+async def adjust_counters(session, user_id: int, deltas: Counter):
+    """Add ``deltas`` (state -> change) to the user's counters.
+
+    Runs as one upsert in the caller's transaction, so the counters commit
+    or roll back together with the todos they count.
+    """
+    values = [
+        {'user_id': user_id, 'state': state, 'count': delta}
+        for state, delta in deltas.items()
+        if delta
+    ]
+    if not values:
+        return
+
+    statement = dialect_insert(session, TodoCounter).values(values)
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TodoCounter.user_id, TodoCounter.state],
+            set_={'count': TodoCounter.count + statement.excluded.count},
+        )
+    )
+
+
+async def bump_todo_version(session, user_id: int):
+    """Mark the user's todos as changed, in the caller's transaction."""
+    statement = dialect_insert(session, TodoVersion).values(
+        user_id=user_id, version=1
+    )
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TodoVersion.user_id],
+            set_={'version': TodoVersion.version + 1},
+        )
+    )
+
+
+async def _read_counters(session, user_id: int):
+    rows = await session.execute(
+        select(TodoCounter.state, TodoCounter.count).where(
+            TodoCounter.user_id == user_id
+        )
+    )
+    return {state: count for state, count in rows if count}
+
+
+async def _count_todos(session, user_id: int):
+    rows = await session.execute(
+        select(Todo.state, func.count())
+        .where(Todo.user_id == user_id)
+        .group_by(Todo.state)
+    )
+    return dict(rows.all())
+
+
+async def rebuild_counters(session, user_id: int):
+    """Set the user's counters to a fresh count of their todos.
+
+    Upserts rather than deleting and reinserting, so a concurrent
+    :func:`adjust_counters` that inserts a new state cannot make the
+    rebuild fail on the primary key.
+    """
+    await session.execute(
+        update(TodoCounter)
+        .where(
+            TodoCounter.user_id == user_id,
+            TodoCounter.state.not_in(
+                select(Todo.state).where(Todo.user_id == user_id)
+            ),
+        )
+        .values(count=0)
+    )
+    statement = dialect_insert(session, TodoCounter).from_select(
+        ['user_id', 'state', 'count'],
+        select(Todo.user_id, Todo.state, func.count())
+        .where(Todo.user_id == user_id)
+        .group_by(Todo.user_id, Todo.state),
+    )
+    await session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[TodoCounter.user_id, TodoCounter.state],
+            set_={'count': statement.excluded.count},
+        )
+    )
+
+
+async def todo_stats(session, user_id: int):
+    counts = await _read_counters(session, user_id)
+    negative = any(count < 0 for count in counts.values())
+
+    if negative or not verified_counters.get(user_id):
+        actual = await _count_todos(session, user_id)
+        if actual != counts:
+            await rebuild_counters(session, user_id)
+            await session.commit()
+            counts = actual
+        verified_counters.set(user_id, True)
+
+    states = {state: counts.get(state, 0) for state in TodoState}
+
+    return {'total': sum(states.values()), 'states': states}
@@ -0,0 +1,183 @@
+"""Lightweight per-request spans, reported in a Server-Timing header."""
+
+import asyncio
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import override
+
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+_current_trace = ContextVar('current_trace', default=None)
+
+
+class Trace:
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.spans = []
+
+    def add(self, name, started_at, duration, **attributes):
+        self.spans.append({
+            'name': name,
+            'start_ms': (started_at - self.started_at) * 1000,
+            'duration_ms': duration * 1000,
+            **attributes,
+        })
+
+    @property
+    def query_count(self):
+        return sum(1 for span in self.spans if span['name'] == 'sql')
+
+    def server_timing(self):
+        totals = {}
+        for span in self.spans:
+            totals[span['name']] = (
+                totals.get(span['name'], 0.0) + span['duration_ms']
+            )
+
+        metrics = [
+            f'{name};dur={duration:.3f}' for name, duration in totals.items()
+        ]
+        metrics.append(f'queries;desc="{self.query_count}"')
+        metrics.append(
+            f'app;dur={(time.perf_counter() - self.started_at) * 1000:.3f}'
+        )
+
+        return ', '.join(metrics)
+
+
+@contextmanager
+def span(name, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(
+            name, started_at, time.perf_counter() - started_at, **attributes
+        )
+
+
+class TracedJSONResponse(JSONResponse):
+    @override
+    def render(self, content) -> bytes:
+        with span('render'):
+            return super().render(content)
+
+
+class TraceWriter:
+    """Appends records to ``path`` as JSON lines, from a background thread.
+
+    Requests only enqueue their record, so disk I/O never blocks the event
+    loop; a single writer keeps lines whole and in order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name='trace-writer', daemon=True
+        )
+        self._thread.start()
+
+    def write(self, record):
+        self._queue.put(record)
+
+    def flush(self):
+        """Block until every record written so far is on disk."""
+        self._queue.join()
+
+    def _run(self):
+        with open(self.path, 'a', encoding='utf-8') as trace_file:
+            while True:
+                record = self._queue.get()
+                trace_file.write(json.dumps(record) + '\n')
+                if self._queue.unfinished_tasks == 1:
+                    trace_file.flush()
+                self._queue.task_done()
+
+
+class TracingMiddleware:
+    """Collects the spans of each request into a Server-Timing header.
+
+    When ``trace_file`` is set every trace is also appended to it as one
+    JSON line, with its individual spans and SQL statements, through a
+    :class:`TraceWriter` flushed when the app shuts down.
+    """
+
+    def __init__(self, app, trace_file=None):
+        self.app = app
+        self.writer = TraceWriter(trace_file) if trace_file else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            if scope['type'] == 'lifespan' and self.writer:
+                await asyncio.to_thread(self.writer.flush)
+            return
+
+        trace = Trace()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', trace.server_timing())
+            await send(message)
+
+        token = _current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            if self.writer:
+                self._write(scope, status, trace)
+
+    def _write(self, scope, status, trace):
+        record = {
+            'method': scope['method'],
+            'path': scope['path'],
+            'route': getattr(scope.get('route'), 'path', None),
+            'status': status,
+            'duration_ms': (time.perf_counter() - trace.started_at) * 1000,
+            'query_count': trace.query_count,
+            'spans': trace.spans,
+        }
+        self.writer.write(record)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    context._span_started_at = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, *_):
+    trace = _current_trace.get()
+    if trace is not None:
+        started_at = context._span_started_at
+        trace.add(
+            'sql',
+            started_at,
+            time.perf_counter() - started_at,
+            statement=statement[:200],
+        )
+
+
+def trace_sqlalchemy():
+    """Add a span for every SQL statement run while a request is traced."""
+    if not event.contains(
+        Engine, 'before_cursor_execute', _before_cursor_execute
+    ):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
@@ -14,7 +14,8 @@ config = context.config
 config.set_main_option('sqlalchemy.url', Settings().DATABASE_URL)
 
 if config.config_file_name is not None:
-    fileConfig(config.config_file_name)
+    # Migrations may run inside the server process; keep its loggers.
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
 
 target_metadata = table_registry.metadata
 
@@ -0,0 +1,59 @@
+"""add todo access path indexes
+
+Revision ID: 5b2d8e41c7a3
+Revises: 70be7684ca14
+Create Date: 2026-10-17 10:12:41.208314
+
+"""
+from contextlib import nullcontext
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b2d8e41c7a3'
+down_revision: Union[str, None] = '70be7684ca14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Every todo query filters on user_id; these match list_todos (by id, by
+# state and by updated_at for keyset pages) and the patch/delete lookups.
+# users.email is already covered by the index behind its unique constraint.
+INDEXES = {
+    'ix_todos_user_id_id': ['user_id', 'id'],
+    'ix_todos_user_id_state_id': ['user_id', 'state', 'id'],
+    'ix_todos_user_id_updated_at_id': ['user_id', 'updated_at', 'id'],
+}
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+    with _autocommit_on_postgres():
+        for name, columns in INDEXES.items():
+            op.create_index(
+                name,
+                'todos',
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with _autocommit_on_postgres():
+        for name in INDEXES:
+            op.drop_index(
+                name,
+                table_name='todos',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def _autocommit_on_postgres():
+    context = op.get_context()
+    if context.dialect.name == 'postgresql':
+        return context.autocommit_block()
+    return nullcontext()
+
@@ -0,0 +1,79 @@
+"""add todo search indexes
+
+Revision ID: 8f4a1c6e2b90
+Revises: 5b2d8e41c7a3
+Create Date: 2026-10-17 11:03:27.554102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f4a1c6e2b90'
+down_revision: Union[str, None] = '5b2d8e41c7a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+POSTGRES_INDEXES = {
+    'ix_todos_title_trgm': 'USING gin (title gin_trgm_ops)',
+    'ix_todos_description_trgm': 'USING gin (description gin_trgm_ops)',
+    'ix_todos_search': (
+        "USING gin (to_tsvector('simple', title || ' ' || description))"
+    ),
+}
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE todos_fts USING fts5("
+    "title, description, content='todos', content_rowid='id')",
+    "CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN "
+    "INSERT INTO todos_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description "
+    "ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO todos_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "INSERT INTO todos_fts(todos_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS todos_fts_au',
+    'DROP TRIGGER IF EXISTS todos_fts_ad',
+    'DROP TRIGGER IF EXISTS todos_fts_ai',
+    'DROP TABLE IF EXISTS todos_fts',
+]
+
+
+def upgrade() -> None:
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+        with op.get_context().autocommit_block():
+            for name, definition in POSTGRES_INDEXES.items():
+                op.execute(
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} '
+                    f'ON todos {definition}'
+                )
+    elif dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name in POSTGRES_INDEXES:
+                op.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {name}')
+    elif dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
@@ -0,0 +1,38 @@
+"""add todo counters
+
+Revision ID: c3e7a9d15f42
+Revises: 8f4a1c6e2b90
+Create Date: 2026-10-17 15:12:48.301947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a9d15f42'
+down_revision: Union[str, None] = '8f4a1c6e2b90'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('todo_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('state', postgresql.ENUM('draft', 'todo', 'doing', 'done', 'trash', name='todostate', create_type=False), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'state')
+    )
+    # Start from the todos that already exist.
+    op.execute(
+        'INSERT INTO todo_counters (user_id, state, count) '
+        'SELECT user_id, state, count(*) FROM todos GROUP BY user_id, state'
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('todo_counters')
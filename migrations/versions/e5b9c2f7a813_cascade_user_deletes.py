@@ -0,0 +1,91 @@
+"""cascade user deletes
+
+Revision ID: e5b9c2f7a813
+Revises: c3e7a9d15f42
+Create Date: 2026-10-17 18:41:09.126583
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b9c2f7a813'
+down_revision: Union[str, None] = 'c3e7a9d15f42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ('todos', 'todo_counters')
+
+# SQLite cannot alter a constraint, so batch mode copies each table into a
+# new one; naming the reflected, unnamed foreign keys lets it drop them.
+SQLITE_NAMING = {
+    'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'
+}
+
+# Dropping the old todos table takes its full-text search triggers with it;
+# todos_fts itself is keyed by todo id, which the copy keeps.
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER todos_fts_ai AFTER INSERT ON todos BEGIN "
+    "INSERT INTO todos_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+    "CREATE TRIGGER todos_fts_ad AFTER DELETE ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); END",
+    "CREATE TRIGGER todos_fts_au AFTER UPDATE OF title, description "
+    "ON todos BEGIN "
+    "INSERT INTO todos_fts(todos_fts, rowid, title, description) "
+    "VALUES ('delete', old.id, old.title, old.description); "
+    "INSERT INTO todos_fts(rowid, title, description) "
+    "VALUES (new.id, new.title, new.description); END",
+]
+
+
+def _replace_foreign_keys(ondelete):
+    dialect = op.get_context().dialect.name
+
+    if dialect == 'postgresql':
+        action = f'ON DELETE {ondelete}' if ondelete else ''
+        # NOT VALID makes the swap instant, so the ACCESS EXCLUSIVE locks it
+        # takes are released as soon as this transaction commits.
+        for table in TABLES:
+            name = f'{table}_user_id_fkey'
+            op.execute(
+                f'ALTER TABLE {table} DROP CONSTRAINT {name}, '
+                f'ADD CONSTRAINT {name} FOREIGN KEY (user_id) '
+                f'REFERENCES users (id) {action} NOT VALID'
+            )
+        # The autocommit block commits the swap first. VALIDATE then scans
+        # under SHARE UPDATE EXCLUSIVE on the table and ROW SHARE on users,
+        # which let reads and writes through.
+        with op.get_context().autocommit_block():
+            for table in TABLES:
+                op.execute(
+                    f'ALTER TABLE {table} '
+                    f'VALIDATE CONSTRAINT {table}_user_id_fkey'
+                )
+    elif dialect == 'sqlite':
+        for table in TABLES:
+            name = f'fk_{table}_user_id_users'
+            with op.batch_alter_table(
+                table, naming_convention=SQLITE_NAMING
+            ) as batch_op:
+                batch_op.drop_constraint(name, type_='foreignkey')
+                batch_op.create_foreign_key(
+                    name,
+                    'users',
+                    ['user_id'],
+                    ['id'],
+                    ondelete=ondelete,
+                )
+        for statement in SQLITE_TRIGGERS:
+            op.execute(statement)
+
+
+def upgrade() -> None:
+    _replace_foreign_keys('CASCADE')
+
+
+def downgrade() -> None:
+    _replace_foreign_keys(None)
@@ -9,19 +9,42 @@ from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from testcontainers.postgres import PostgresContainer
 
-from fast_zero.app import app
-from fast_zero.database import get_session
+from fast_zero.admission import (
+    login_account_limiter,
+    login_ip_limiter,
+    signup_ip_limiter,
+)
+from fast_zero.app import app, settings
+from fast_zero.database import get_read_session, get_session
 from fast_zero.models import User, table_registry
-from fast_zero.security import get_password_hash
+from fast_zero.security import get_password_hash, principal_cache
+from fast_zero.stats import verified_counters
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    yield
+    principal_cache.clear()
+    verified_counters.clear()
+    for limiter in (
+        login_ip_limiter,
+        login_account_limiter,
+        signup_ip_limiter,
+    ):
+        limiter.clear()
 
 
 @pytest.fixture
-def client(session):
+def client(session, monkeypatch):
     def get_session_override():
         return session
 
+    # Warm-up targets the app's own engine, which the tests replace.
+    monkeypatch.setattr(settings, 'STARTUP_WARMUP', False)
+
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_override
+        app.dependency_overrides[get_read_session] = get_session_override
         yield client
 
     app.dependency_overrides.clear()
@@ -67,6 +90,29 @@ def mock_db_time():
     return _mock_db_time
 
 
+@contextmanager
+def _count_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+    yield statements
+
+    event.remove(
+        engine.sync_engine, 'before_cursor_execute', before_cursor_execute
+    )
+
+
+@pytest.fixture
+def count_queries():
+    return _count_queries
+
+
 @pytest_asyncio.fixture
 async def user(session):
     password = 'testtest'
@@ -0,0 +1,193 @@
+from http import HTTPStatus
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
+
+from fast_zero.admission import (
+    LoadSheddingMiddleware,
+    RateLimiter,
+    login_account_limiter,
+    settings,
+    signup_ip_limiter,
+)
+from fast_zero.app import app
+from fast_zero.server import server_options
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakePoolMonitor:
+    def __init__(self, wait=0.0):
+        self.wait = wait
+
+    def recent_wait(self):
+        return self.wait
+
+
+def test_rate_limiter_allows_burst_then_refills():
+    timer = FakeTimer()
+    limiter = RateLimiter(rate=2.0, burst=2, timer=timer)
+    expected_retry_after = 0.5
+
+    assert limiter.acquire('a') == 0
+    assert limiter.acquire('a') == 0
+    assert limiter.acquire('a') == expected_retry_after
+    assert limiter.acquire('b') == 0
+
+    timer.now = 0.5
+    assert limiter.acquire('a') == 0
+
+
+def test_rate_limiter_evicts_least_recently_used():
+    limiter = RateLimiter(rate=1.0, burst=1, maxsize=1, timer=FakeTimer())
+
+    limiter.acquire('a')
+    limiter.acquire('b')
+
+    assert limiter.acquire('a') == 0
+
+
+def _shedding_client(monitor, max_in_flight=10):
+    app = FastAPI()
+    app.add_middleware(
+        LoadSheddingMiddleware,
+        pool_monitor=monitor,
+        max_in_flight=max_in_flight,
+        max_pool_wait=1.0,
+    )
+
+    @app.get('/')
+    def root():
+        return {}
+
+    @app.get('/work')
+    def work():
+        return {}
+
+    return TestClient(app)
+
+
+def test_load_shedding_on_pool_wait():
+    client = _shedding_client(FakePoolMonitor(wait=2.0))
+
+    response = client.get('/work')
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
+    assert client.get('/').status_code == HTTPStatus.OK
+
+
+def test_load_shedding_on_in_flight():
+    client = _shedding_client(FakePoolMonitor(), max_in_flight=0)
+
+    assert client.get('/work').status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert client.get('/').status_code == HTTPStatus.OK
+
+
+def test_no_load_shedding_when_healthy():
+    client = _shedding_client(FakePoolMonitor(wait=0.5))
+
+    assert client.get('/work').status_code == HTTPStatus.OK
+
+
+def test_login_rate_limited_per_account(client, user, monkeypatch):
+    monkeypatch.setattr(login_account_limiter, 'burst', 1)
+    data = {'username': user.email, 'password': 'wrong'}
+
+    client.post('/auth/token', data=data)
+    response = client.post(
+        '/auth/token', data={**data, 'username': user.email.upper()}
+    )
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers['Retry-After']) >= 1
+
+
+def test_signup_rate_limited_per_ip(client, monkeypatch):
+    monkeypatch.setattr(signup_ip_limiter, 'burst', 1)
+
+    statuses = [
+        client.post(
+            '/users/',
+            json={
+                'username': f'user{i}',
+                'email': f'user{i}@example.com',
+                'password': 'secret',
+            },
+        ).status_code
+        for i in range(2)
+    ]
+
+    assert statuses == [HTTPStatus.CREATED, HTTPStatus.TOO_MANY_REQUESTS]
+
+
+def _signups(client, headers):
+    return [
+        client.post(
+            '/users/',
+            json={
+                'username': f'user{i}',
+                'email': f'user{i}@example.com',
+                'password': 'secret',
+            },
+            headers=header,
+        ).status_code
+        for i, header in enumerate(headers)
+    ]
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_bucket(client, monkeypatch):
+    monkeypatch.setattr(signup_ip_limiter, 'burst', 1)
+    # The server as deployed: uvicorn applying proxy headers.
+    proxied = TestClient(
+        ProxyHeadersMiddleware(
+            app,
+            trusted_hosts=server_options(settings)['forwarded_allow_ips'],
+        )
+    )
+
+    statuses = _signups(
+        proxied,
+        [{'X-Forwarded-For': f'203.0.113.{i}'} for i in range(2)],
+    )
+
+    assert statuses == [HTTPStatus.CREATED, HTTPStatus.TOO_MANY_REQUESTS]
+
+
+def test_rate_limited_by_client_ip_header(client, monkeypatch):
+    monkeypatch.setattr(signup_ip_limiter, 'burst', 1)
+    monkeypatch.setattr(settings, 'CLIENT_IP_HEADER', 'Fly-Client-IP')
+
+    statuses = _signups(
+        client,
+        [
+            {'Fly-Client-IP': '198.51.100.1', 'X-Forwarded-For': '1.1.1.1'},
+            {'Fly-Client-IP': '198.51.100.1', 'X-Forwarded-For': '2.2.2.2'},
+            {'Fly-Client-IP': '198.51.100.2'},
+        ],
+    )
+
+    assert statuses == [
+        HTTPStatus.CREATED,
+        HTTPStatus.TOO_MANY_REQUESTS,
+        HTTPStatus.CREATED,
+    ]
+
+
+def test_rate_limits_can_be_disabled(client, user, monkeypatch):
+    monkeypatch.setattr(login_account_limiter, 'burst', 0)
+    monkeypatch.setattr(settings, 'RATE_LIMIT_ENABLED', False)
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.OK
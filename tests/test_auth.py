@@ -1,6 +1,15 @@
 from http import HTTPStatus
 
+import pytest
 from freezegun import freeze_time
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import update
+
+from fast_zero.models import User
+from fast_zero.routers import auth
+from fast_zero.security import get_password_hash, hashing_pool, pwd_context
+from tests.conftest import UserFactory
 
 
 def test_get_token(client, user):
@@ -88,3 +97,93 @@ def test_token_expired_dont_refresh(client, user):
         )
         assert response.status_code == HTTPStatus.UNAUTHORIZED
         assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_token_when_hashing_pool_is_full(client, user, monkeypatch):
+    monkeypatch.setattr(hashing_pool, 'workers', 0)
+    monkeypatch.setattr(hashing_pool, 'max_queue', 0)
+
+    response = client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+
+    assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert response.headers['Retry-After'] == '1'
+
+
+def test_hashing_stats(client):
+    response = client.get('/internal/hashing')
+
+    assert response.status_code == HTTPStatus.OK
+    assert {'in_flight', 'queue_depth', 'wait_seconds_total'} <= set(
+        response.json()
+    )
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_outdated_password(client, session):
+    password = 'testtest'
+    outdated = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8_192),))
+    user = UserFactory(password=outdated.hash(password))
+    session.add(user)
+    await session.commit()
+    old_hash = user.password
+
+    response = client.post(
+        '/auth/token', data={'username': user.email, 'password': password}
+    )
+    await session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert user.password != old_hash
+    assert not pwd_context.current_hasher.check_needs_rehash(user.password)
+
+
+@pytest.mark.asyncio
+async def test_login_rehash_keeps_password_changed_meanwhile(
+    client, session, monkeypatch
+):
+    password = 'testtest'
+    outdated = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8_192),))
+    user = UserFactory(password=outdated.hash(password))
+    session.add(user)
+    await session.commit()
+    new_hash = get_password_hash('changed')
+    verify = auth.verify_and_update_password_async
+
+    async def verify_during_password_change(plain_password, hashed_password):
+        result = await verify(plain_password, hashed_password)
+        # PUT /users/{id} lands while argon2 is verifying.
+        await session.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        return result
+
+    monkeypatch.setattr(
+        auth, 'verify_and_update_password_async', verify_during_password_change
+    )
+
+    response = client.post(
+        '/auth/token', data={'username': user.email, 'password': password}
+    )
+    await session.refresh(user)
+
+    assert response.status_code == HTTPStatus.OK
+    assert user.password == new_hash
+
+
+@pytest.mark.asyncio
+async def test_login_keeps_current_password_hash(client, session, user):
+    old_hash = user.password
+
+    client.post(
+        '/auth/token',
+        data={'username': user.email, 'password': user.clean_password},
+    )
+    await session.refresh(user)
+
+    assert user.password == old_hash
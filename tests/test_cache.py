@@ -0,0 +1,64 @@
+from fast_zero.cache import TTLCache
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_and_miss():
+    cache = TTLCache(maxsize=2, ttl=10)
+
+    assert cache.get('a') is None
+    cache.set('a', 1)
+
+    assert cache.get('a') == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_cache_entries_expire():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=2, ttl=10, timer=timer)
+    cache.set('a', 1)
+
+    timer.now = 10
+
+    assert cache.get('a') is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used():
+    expected_value = 3
+    cache = TTLCache(maxsize=2, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+
+    cache.set('c', expected_value)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == expected_value
+
+
+def test_cache_invalidate_where():
+    expected_value = 2
+    cache = TTLCache(maxsize=10, ttl=10)
+    cache.set('a', 1)
+    cache.set('b', expected_value)
+
+    cache.invalidate_where(lambda value: value == 1)
+
+    assert cache.get('a') is None
+    assert cache.get('b') == expected_value
+
+
+def test_cache_disabled_with_zero_ttl():
+    cache = TTLCache(maxsize=10, ttl=0)
+    cache.set('a', 1)
+
+    assert cache.get('a') is None
@@ -0,0 +1,50 @@
+from fast_zero.calibrate import MIN_MEMORY_COST, calibrate
+
+MAX_MEMORY_COST = 65_536
+
+
+def cost_model(time_cost, memory_cost, parallelism):
+    # One pass over 64 MiB takes 100ms; passes and memory scale linearly.
+    return time_cost * memory_cost / MAX_MEMORY_COST * 0.1
+
+
+def test_calibrate_raises_time_cost_within_target():
+    target = 0.35
+    expected_time_cost = 3
+
+    time_cost, memory_cost, elapsed = calibrate(
+        target,
+        parallelism=1,
+        max_memory_cost=MAX_MEMORY_COST,
+        measure=cost_model,
+    )
+
+    assert time_cost == expected_time_cost
+    assert memory_cost == MAX_MEMORY_COST
+    assert elapsed <= target
+
+
+def test_calibrate_lowers_memory_cost_for_a_tight_target():
+    expected_memory_cost = 16_384
+
+    time_cost, memory_cost, _ = calibrate(
+        0.03,
+        parallelism=1,
+        max_memory_cost=MAX_MEMORY_COST,
+        measure=cost_model,
+    )
+
+    assert time_cost == 1
+    assert memory_cost == expected_memory_cost
+
+
+def test_calibrate_stops_at_minimum_memory_cost():
+    time_cost, memory_cost, _ = calibrate(
+        0.001,
+        parallelism=1,
+        max_memory_cost=MAX_MEMORY_COST,
+        measure=cost_model,
+    )
+
+    assert time_cost == 1
+    assert memory_cost == MIN_MEMORY_COST
@@ -0,0 +1,263 @@
+import math
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from starlette.requests import Request
+
+from fast_zero.database import (
+    READ_PRIMARY_COOKIE,
+    MonitoredQueuePool,
+    PoolMonitor,
+    ReadYourWritesMiddleware,
+    SessionRouter,
+    engine_options,
+)
+from fast_zero.settings import Settings
+
+
+def test_engine_options_for_queue_pool():
+    settings = Settings(DATABASE_POOL_SIZE=20, DATABASE_POOL_PRE_PING=True)
+
+    options = engine_options('postgresql+psycopg://app@db/app', settings)
+
+    assert options['pool_size'] == settings.DATABASE_POOL_SIZE
+    assert options['max_overflow'] == settings.DATABASE_MAX_OVERFLOW
+    assert options['pool_timeout'] == settings.DATABASE_POOL_TIMEOUT
+    assert options['pool_pre_ping'] is True
+    assert options['poolclass'] is MonitoredQueuePool
+
+
+def test_engine_options_for_in_memory_sqlite():
+    options = engine_options('sqlite+aiosqlite:///:memory:', Settings())
+
+    assert 'pool_size' not in options
+
+
+@pytest.mark.asyncio
+async def test_pool_monitor_stats(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path}/pool.db'
+    engine = create_async_engine(url, **engine_options(url, Settings()))
+    monitor = PoolMonitor()
+    monitor.watch(engine)
+
+    async with AsyncSession(engine) as session:
+        unused_stats = monitor.stats(engine)
+        await session.execute(text('SELECT 1'))
+        stats = monitor.stats(engine)
+
+    await engine.dispose()
+
+    assert unused_stats['checkouts'] == 0
+    assert stats['checked_out'] == 1
+    assert stats['checkouts'] == 1
+    assert stats['timeouts'] == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_monitor_counts_timeouts(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path}/pool.db'
+    settings = Settings(
+        DATABASE_POOL_SIZE=1, DATABASE_MAX_OVERFLOW=0, DATABASE_POOL_TIMEOUT=0
+    )
+    engine = create_async_engine(url, **engine_options(url, settings))
+    monitor = PoolMonitor()
+    monitor.watch(engine)
+
+    async with engine.connect():
+        with pytest.raises(PoolTimeoutError):
+            await engine.connect().start()
+
+    await engine.dispose()
+
+    expected_checkouts = 2
+    assert monitor.checkouts == expected_checkouts
+    assert monitor.timeouts == 1
+
+
+def test_read_pool_stats(client):
+    response = client.get('/internal/pool')
+
+    assert response.status_code == HTTPStatus.OK
+    assert {'pool', 'checkouts', 'wait_seconds_total'} <= set(response.json())
+
+
+def test_pool_monitor_recent_wait_decays():
+    now = [0.0]
+    monitor = PoolMonitor(timer=lambda: now[0])
+    monitor._recent_wait = 2.0
+
+    now[0] = 1.0
+
+    assert monitor.recent_wait() == pytest.approx(2.0 / math.e)
+
+
+def _request(method='GET', host='10.0.0.1', token=None, cookie=None):
+    headers = [(b'authorization', f'Bearer {token}'.encode())] if token else []
+    if cookie:
+        headers.append((b'cookie', cookie.split(';')[0].encode()))
+    return Request({
+        'type': 'http',
+        'method': method,
+        'scheme': 'http',
+        'server': ('testserver', 80),
+        'path': '/',
+        'headers': headers,
+        'client': (host, 1234),
+    })
+
+
+async def _bind(session_dependency, request):
+    dependency = session_dependency(request)
+    session = await anext(dependency)
+    await dependency.aclose()
+    return session.bind
+
+
+async def _commit_write(router, request):
+    dependency = router.write_session(request)
+    session = await anext(dependency)
+    await session.execute(text('SELECT 1'))
+    await session.commit()
+    await dependency.aclose()
+    return getattr(request.state, 'read_primary_cookie', None)
+
+
+def _router(engines, sticky_seconds=5):
+    primary, *replicas = engines
+    return SessionRouter(
+        primary, replicas, sticky_seconds=sticky_seconds, secret_key='secret'
+    )
+
+
+@pytest_asyncio.fixture
+async def engines(tmp_path):
+    urls = [f'sqlite+aiosqlite:///{tmp_path}/{name}.db' for name in 'abc']
+    engines = [create_async_engine(url) for url in urls]
+    yield engines
+    for engine in engines:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_session_router_reads_from_replicas_round_robin(engines):
+    _, *replicas = engines
+    router = _router(engines)
+
+    binds = [await _bind(router.read_session, _request()) for _ in range(4)]
+
+    assert binds == [*replicas, *replicas]
+
+
+@pytest.mark.asyncio
+async def test_session_router_without_replicas_reads_from_primary(engines):
+    primary = engines[0]
+    router = SessionRouter(primary, sticky_seconds=5, secret_key='secret')
+
+    assert await _bind(router.read_session, _request()) is primary
+
+
+@pytest.mark.asyncio
+async def test_session_router_sticky_cookie_works_across_workers(engines):
+    primary, *replicas = engines
+    # Two workers: the write lands on one, the next read on the other.
+    writer, reader = _router(engines), _router(engines)
+
+    cookie = await _commit_write(writer, _request('POST', token='a'))
+
+    assert await _bind(reader.read_session, _request(cookie=cookie)) is primary
+    assert await _bind(reader.read_session, _request(token='a')) in replicas
+
+
+@pytest.mark.asyncio
+async def test_session_router_ignores_forged_cookie(engines):
+    _, *replicas = engines
+    forger = SessionRouter(
+        engines[0], replicas, sticky_seconds=5, secret_key='other'
+    )
+    cookie = await _commit_write(forger, _request('POST'))
+
+    assert (
+        await _bind(_router(engines).read_session, _request(cookie=cookie))
+        in replicas
+    )
+
+
+@pytest.mark.asyncio
+async def test_session_router_marks_writes_only_once_committed(engines):
+    _, *replicas = engines
+    router = _router(engines)
+    request = _request('POST', token='a')
+
+    await _bind(router.write_session, request)
+
+    assert getattr(request.state, 'read_primary_cookie', None) is None
+    assert await _bind(router.read_session, _request(token='a')) in replicas
+
+
+@pytest.mark.asyncio
+async def test_session_router_falls_back_to_credentials_in_process(engines):
+    primary, *replicas = engines
+    router = _router(engines)
+
+    await _commit_write(router, _request('POST', token='a'))
+
+    assert await _bind(router.read_session, _request(token='a')) is primary
+    # Same proxy address, other credentials.
+    assert await _bind(router.read_session, _request(token='b')) in replicas
+
+
+@pytest.mark.asyncio
+async def test_session_router_without_sticky_window(engines):
+    _, *replicas = engines
+    router = _router(engines, sticky_seconds=0)
+
+    cookie = await _commit_write(router, _request('POST'))
+
+    assert cookie is None
+    assert await _bind(router.read_session, _request()) in replicas
+
+
+@pytest.mark.asyncio
+async def test_session_router_shares_primary_session_in_writes(engines):
+    primary = engines[0]
+    router = _router(engines)
+    request = _request('DELETE')
+
+    writes = router.write_session(request)
+    reads = router.read_session(request)
+    write_session = await anext(writes)
+    read_session = await anext(reads)
+
+    assert read_session is write_session
+    assert write_session.bind is primary
+    # The connection is only checked out by the first statement.
+    assert not write_session.in_transaction()
+
+    await reads.aclose()
+    await writes.aclose()
+
+
+def test_read_your_writes_middleware_sets_cookie(engines):
+    router = _router(engines)
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware)
+
+    @app.post('/write')
+    async def write(session=Depends(router.write_session)):
+        await session.execute(text('SELECT 1'))
+        await session.commit()
+
+    @app.post('/noop')
+    async def noop(session=Depends(router.write_session)):
+        pass
+
+    client = TestClient(app)
+
+    assert READ_PRIMARY_COOKIE in client.post('/write').cookies
+    assert READ_PRIMARY_COOKIE not in client.post('/noop').cookies
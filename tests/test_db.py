@@ -2,6 +2,8 @@ from dataclasses import asdict
 
 import pytest
 from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
 
 from fast_zero.models import Todo, User
 
@@ -15,7 +17,11 @@ async def test_create_user(session, mock_db_time):
         session.add(new_user)
         await session.commit()
 
-    user = await session.scalar(select(User).where(User.username == 'alice'))
+    user = await session.scalar(
+        select(User)
+        .where(User.username == 'alice')
+        .options(selectinload(User.todos))
+    )
 
     assert asdict(user) == {
         'id': 1,
@@ -67,6 +73,18 @@ async def test_user_todo_relationship(session, user):
     await session.commit()
     await session.refresh(user)
 
-    user = await session.scalar(select(User).where(User.id == user.id))
+    user = await session.scalar(
+        select(User)
+        .where(User.id == user.id)
+        .options(selectinload(User.todos))
+    )
 
     assert user.todos == [todo]
+
+
+@pytest.mark.asyncio
+async def test_user_todos_are_not_loaded_implicitly(session, user):
+    user = await session.scalar(select(User).where(User.id == user.id))
+
+    with pytest.raises(InvalidRequestError):
+        user.todos
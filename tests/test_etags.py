@@ -0,0 +1,18 @@
+from fast_zero.etags import etag_matches, weak_etag
+
+
+def test_weak_etag_is_stable():
+    assert weak_etag('todos', 1, 3) == weak_etag('todos', 1, 3)
+    assert weak_etag('todos', 1, 3) != weak_etag('todos', 1, 4)
+    assert weak_etag('todos', 1, 3).startswith('W/"')
+
+
+def test_etag_matches():
+    etag = weak_etag('user', 1)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(etag.removeprefix('W/'), etag)
+    assert etag_matches(f'W/"other", {etag}', etag)
+    assert etag_matches('*', etag)
+    assert not etag_matches(None, etag)
+    assert not etag_matches('W/"other"', etag)
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from fast_zero.hashing import HashingPool, HashingQueueFullError
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_runs_function_in_executor():
+    pool = HashingPool(workers=1, max_queue=1)
+
+    result = await pool.run(pow, 2, 10)
+    pool.shutdown()
+
+    assert result == 2**10
+    assert pool.stats()['completed'] == 1
+    assert pool.stats()['in_flight'] == 0
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_with_process_executor():
+    pool = HashingPool(executor='process', workers=1, max_queue=0)
+
+    result = await pool.run(pow, 3, 3)
+    pool.shutdown()
+
+    assert result == 3**3
+
+
+@pytest.mark.asyncio
+async def test_hashing_pool_rejects_when_queue_is_full():
+    expected_completed = 2
+    pool = HashingPool(workers=1, max_queue=1)
+    blocker = asyncio.Event()
+
+    def wait():
+        asyncio.run_coroutine_threadsafe(blocker.wait(), loop).result()
+
+    loop = asyncio.get_running_loop()
+    tasks = [asyncio.create_task(pool.run(wait)) for _ in range(2)]
+    await asyncio.sleep(0.05)
+
+    with pytest.raises(HashingQueueFullError):
+        await pool.run(pow, 2, 2)
+
+    assert pool.stats()['queue_depth'] == 1
+    assert pool.stats()['rejected'] == 1
+
+    blocker.set()
+    await asyncio.gather(*tasks)
+    pool.shutdown()
+
+    assert pool.stats()['completed'] == expected_completed
@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+from fast_zero.metrics import (
+    DB_QUERIES,
+    HTTP_REQUESTS,
+    PASSWORD_HASH_DURATION,
+    Counter,
+    Histogram,
+)
+
+
+def test_counter_render():
+    counter = Counter('jobs_total', 'Jobs.', ('queue',))
+    counter.inc(queue='default')
+    counter.inc(2, queue='default')
+
+    assert counter.render() == (
+        '# HELP jobs_total Jobs.\n'
+        '# TYPE jobs_total counter\n'
+        'jobs_total{queue="default"} 3.0'
+    )
+
+
+def test_histogram_render():
+    histogram = Histogram('latency_seconds', 'Latency.', buckets=(0.1, 1.0))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1.0',
+        'latency_seconds_bucket{le="1.0"} 2.0',
+        'latency_seconds_bucket{le="+Inf"} 3.0',
+        'latency_seconds_sum 5.55',
+        'latency_seconds_count 3.0',
+    ]
+
+
+def test_metrics_endpoint(client, user, token):
+    requests_before = HTTP_REQUESTS.value(
+        method='GET', route='/todos/', status=HTTPStatus.OK
+    )
+    queries_before = DB_QUERIES.value(statement='SELECT')
+
+    client.get('/todos/', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain')
+    assert (
+        HTTP_REQUESTS.value(
+            method='GET', route='/todos/', status=HTTPStatus.OK
+        )
+        == requests_before + 1
+    )
+    assert DB_QUERIES.value(statement='SELECT') > queries_before
+    assert PASSWORD_HASH_DURATION.count() > 0
+    assert 'http_request_duration_seconds_bucket' in response.text
+    assert 'http_requests_in_flight' in response.text
+    assert 'db_pool_wait_seconds_total' in response.text
@@ -0,0 +1,20 @@
+import pytest
+
+from fast_zero.migrate import alembic_config, migrate
+from fast_zero.settings import get_settings
+
+
+@pytest.fixture
+def database_url(tmp_path, monkeypatch):
+    url = f'sqlite+aiosqlite:///{tmp_path}/migrate.db'
+    monkeypatch.setenv('DATABASE_URL', url)
+    get_settings.cache_clear()
+    yield url
+    get_settings.cache_clear()
+
+
+def test_migrate_upgrades_then_skips(database_url):
+    config = alembic_config()
+
+    assert migrate(config, database_url) is True
+    assert migrate(config, database_url) is False
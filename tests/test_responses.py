@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from fast_zero import responses
+from fast_zero.models import TodoState
+
+CONTENT = {
+    'todos': [
+        {
+            'id': 1,
+            'title': 'Café ✓',
+            'state': TodoState.done,
+            'created_at': datetime(2024, 1, 1, 12, 30, 15, 250),
+        }
+    ],
+    'next_cursor': None,
+}
+EXPECTED = (
+    '{"todos":[{"id":1,"title":"Café ✓","state":"done",'.encode()
+    + b'"created_at":"2024-01-01T12:30:15.000250"}],"next_cursor":null}'
+)
+
+
+def test_dumps():
+    assert responses.dumps(CONTENT) == EXPECTED
+
+
+def test_dumps_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, 'orjson', None)
+
+    assert responses.dumps(CONTENT) == EXPECTED
@@ -2,7 +2,11 @@ from http import HTTPStatus
 
 from jwt import decode
 
-from fast_zero.security import create_access_token, settings
+from fast_zero.security import (
+    create_access_token,
+    principal_cache,
+    settings,
+)
 
 
 def test_jwt():
@@ -50,3 +54,70 @@ def test_get_current_user_does_not_exists__exercicio(client):
 
     assert response.status_code == HTTPStatus.UNAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_token_subject_is_user_id(token, user):
+    decoded = decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )
+
+    assert decoded['sub'] == str(user.id)
+
+
+def test_legacy_email_subject_is_accepted(client, user):
+    token = create_access_token(data={'sub': user.email})
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_get_current_user_unknown_user_id(client):
+    token = create_access_token(data={'sub': '999'})
+
+    response = client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_get_current_user_is_cached(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.post('/auth/refresh_token', headers=headers)
+    client.post('/auth/refresh_token', headers=headers)
+
+    assert principal_cache.stats()['misses'] == 1
+    assert principal_cache.stats()['hits'] == 1
+
+
+def test_principal_cache_invalidated_on_update(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+
+    client.put(
+        f'/users/{user.id}',
+        headers=headers,
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    expected_misses = 2
+    assert response.status_code == HTTPStatus.OK
+    assert principal_cache.stats()['misses'] == expected_misses
+
+
+def test_principal_cache_invalidated_on_delete(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.delete(f'/users/{user.id}', headers=headers)
+    response = client.post('/auth/refresh_token', headers=headers)
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
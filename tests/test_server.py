@@ -0,0 +1,58 @@
+from fast_zero import server
+from fast_zero.settings import Settings
+
+
+def test_available_cpus_honours_cgroup_quota(tmp_path, monkeypatch):
+    cpu_max = tmp_path / 'cpu.max'
+    cpu_max.write_text('150000 100000\n')
+    monkeypatch.setattr(server, 'CGROUP_CPU_MAX', cpu_max)
+    monkeypatch.setattr(server.os, 'sched_getaffinity', lambda pid: {0, 1, 2})
+    expected_cpus = 2
+
+    assert server.available_cpus() == expected_cpus
+
+
+def test_available_cpus_without_quota(tmp_path, monkeypatch):
+    cpu_max = tmp_path / 'cpu.max'
+    cpu_max.write_text('max 100000\n')
+    monkeypatch.setattr(server, 'CGROUP_CPU_MAX', cpu_max)
+    monkeypatch.setattr(server.os, 'sched_getaffinity', lambda pid: {0, 1, 2})
+    expected_cpus = 3
+
+    assert server.available_cpus() == expected_cpus
+
+
+def test_available_cpus_outside_a_cgroup(tmp_path, monkeypatch):
+    monkeypatch.setattr(server, 'CGROUP_CPU_MAX', tmp_path / 'missing')
+    monkeypatch.setattr(server.os, 'sched_getaffinity', lambda pid: {0, 1})
+    expected_cpus = 2
+
+    assert server.available_cpus() == expected_cpus
+
+
+def test_server_options_use_configured_workers(monkeypatch):
+    monkeypatch.setattr(server, '_installed', lambda module: True)
+    expected_workers = 4
+
+    options = server.server_options(Settings(SERVER_WORKERS=4))
+
+    assert options['workers'] == expected_workers
+    assert options['loop'] == 'uvloop'
+    assert options['http'] == 'httptools'
+
+
+def test_server_options_fall_back_without_extras(monkeypatch):
+    monkeypatch.setattr(server, '_installed', lambda module: False)
+    monkeypatch.setattr(server, 'available_cpus', lambda: 1)
+
+    options = server.server_options(Settings())
+
+    assert options['workers'] == 1
+    assert options['loop'] == 'asyncio'
+    assert options['http'] == 'h11'
+
+
+def test_server_options_do_not_trust_any_forwarded_for():
+    options = server.server_options(Settings())
+
+    assert options['forwarded_allow_ips'] == '127.0.0.1'
@@ -0,0 +1,101 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from fast_zero.database import engine_options
+from fast_zero.security import hashing_pool
+from fast_zero.settings import Settings
+from fast_zero.startup import (
+    FirstResponseMiddleware,
+    StartupTimer,
+    process_started_at,
+    warm_up,
+    warm_up_hashing,
+)
+
+
+def test_process_started_at_is_in_the_past():
+    assert process_started_at() <= time.time()
+
+
+def test_startup_timer_keeps_first_mark():
+    now = iter([10.5, 12.0])
+    timer = StartupTimer(started_at=10.0, clock=lambda: next(now))
+    expected_seconds = 0.5
+
+    timer.mark('ready')
+    timer.mark('ready')
+
+    assert timer.stats() == {
+        'started_at': 10.0,
+        'ready_seconds': expected_seconds,
+    }
+
+
+@pytest.mark.asyncio
+async def test_first_response_middleware_marks_once():
+    timer = StartupTimer(started_at=time.time())
+    sent = []
+
+    async def app(scope, receive, send):
+        await send({'type': 'http.response.start', 'status': 200})
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = FirstResponseMiddleware(app, timer=timer)
+    await middleware({'type': 'http'}, None, send)
+    first = timer.marks['first_response']
+    await middleware({'type': 'http'}, None, send)
+
+    expected_messages = 2
+    assert len(sent) == expected_messages
+    assert timer.marks['first_response'] == first
+
+
+@pytest.mark.asyncio
+async def test_warm_up_hashing_runs_every_worker():
+    timer = StartupTimer(started_at=time.time())
+    completed = hashing_pool.stats()['completed']
+
+    await warm_up_hashing(timer)
+
+    assert (
+        hashing_pool.stats()['completed'] == completed + hashing_pool.workers
+    )
+    assert 'hashing_warmed' in timer.marks
+
+
+@pytest.mark.asyncio
+async def test_warm_up_fills_the_pool(tmp_path):
+    url = f'sqlite+aiosqlite:///{tmp_path}/warm.db'
+    settings = Settings(DATABASE_POOL_SIZE=3)
+    engine = create_async_engine(url, **engine_options(url, settings))
+
+    await warm_up(engine)
+    idle = engine.pool.checkedin()
+    await engine.dispose()
+
+    assert idle == settings.DATABASE_POOL_SIZE
+
+
+@pytest.mark.asyncio
+async def test_warm_up_survives_unreachable_database(tmp_path, caplog):
+    engine = create_async_engine(
+        f'sqlite+aiosqlite:///{tmp_path}/missing/warm.db'
+    )
+
+    await warm_up(engine)
+    await engine.dispose()
+
+    assert 'Database warm-up failed' in caplog.text
+
+
+def test_read_startup_stats(client):
+    response = client.get('/internal/startup')
+
+    assert response.status_code == HTTPStatus.OK
+    assert 'imported_seconds' in response.json()
+    assert 'ready_seconds' in response.json()
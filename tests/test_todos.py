@@ -1,9 +1,17 @@
+import csv
+import json
+from collections import Counter
 from http import HTTPStatus
 
 import factory.fuzzy
 import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import sqlite
 
-from fast_zero.models import Todo, TodoState
+from fast_zero.models import Todo, TodoCounter, TodoState
+from fast_zero.routers.todos import settings
+from fast_zero.search import search_todos
+from fast_zero.stats import adjust_counters, rebuild_counters
 
 
 class TodoFactory(factory.Factory):
@@ -97,6 +105,101 @@ async def test_list_todos_with_pagination(session, client, user, token):
     assert len(response.json()['todos']) == expected_todos
 
 
+def test_list_todos_rejects_zero_limit(client, token):
+    response = client.get(
+        '/todos/?limit=0', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_list_todos_with_cursor(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    ids = []
+    cursor = ''
+    while True:
+        page = client.get(
+            f'/todos/?limit=2&cursor={cursor}', headers=headers
+        ).json()
+        ids += [todo['id'] for todo in page['todos']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert ids == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_list_todos_with_cursor_ordered_by_updated_at(
+    session, client, user, token, mock_db_time
+):
+    with mock_db_time(model=Todo):
+        session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+        await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    first_page = client.get(
+        '/todos/?limit=2&order_by=updated_at', headers=headers
+    ).json()
+    second_page = client.get(
+        '/todos/?limit=2&order_by=updated_at'
+        f'&cursor={first_page["next_cursor"]}',
+        headers=headers,
+    ).json()
+
+    assert [todo['id'] for todo in first_page['todos']] == [1, 2]
+    assert [todo['id'] for todo in second_page['todos']] == [3]
+    assert second_page['next_cursor'] is None
+
+
+def test_list_todos_cursor_ordered_by_server_updated_at(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    created_ids = [
+        client.post(
+            '/todos/',
+            json={'title': 'a', 'description': 'b', 'state': 'todo'},
+            headers=headers,
+        ).json()['id']
+        for _ in range(5)
+    ]
+
+    ids = []
+    cursor = ''
+    while True:
+        page = client.get(
+            f'/todos/?limit=2&order_by=updated_at&cursor={cursor}',
+            headers=headers,
+        ).json()
+        ids += [todo['id'] for todo in page['todos']]
+        cursor = page['next_cursor']
+        if not cursor:
+            break
+
+    assert ids == created_ids
+
+
+@pytest.mark.asyncio
+async def test_list_todos_cursor_from_other_order_is_invalid(
+    session, client, user, token
+):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    page = client.get('/todos/?limit=1', headers=headers).json()
+    response = client.get(
+        f'/todos/?order_by=updated_at&cursor={page["next_cursor"]}',
+        headers=headers,
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
 @pytest.mark.asyncio
 async def test_list_todos_per_title(session, user, client, token):
     expected_todos = 4
@@ -178,6 +281,81 @@ async def test_list_todos_with_all_filters(session, user, client, token):
     assert len(response.json()['todos']) == expected_todos
 
 
+@pytest.mark.asyncio
+async def test_list_todos_search(session, client, user, token):
+    session.add_all([
+        TodoFactory.create(
+            user_id=user.id, title='buy milk', description='at the market'
+        ),
+        TodoFactory.create(
+            user_id=user.id, title='walk the dog', description='in the park'
+        ),
+        TodoFactory.create(
+            user_id=user.id, title='cook', description='milk and eggs'
+        ),
+    ])
+    await session.commit()
+
+    response = client.get(
+        '/todos/?q=milk',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert {todo['title'] for todo in response.json()['todos']} == {
+        'buy milk',
+        'cook',
+    }
+    assert response.json()['next_cursor'] is None
+
+
+@pytest.mark.asyncio
+async def test_list_todos_search_sees_updates(session, client, user, token):
+    todo = TodoFactory.create(user_id=user.id, title='old', description='x')
+    session.add(todo)
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    client.patch(f'/todos/{todo.id}', json={'title': 'new'}, headers=headers)
+
+    assert client.get('/todos/?q=old', headers=headers).json()['todos'] == []
+    assert len(client.get('/todos/?q=new', headers=headers).json()['todos'])
+
+
+@pytest.mark.asyncio
+async def test_list_todos_blank_search_lists_everything(
+    session, client, user, token
+):
+    expected_todos = 2
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/?q=%20%20', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert len(response.json()['todos']) == expected_todos
+
+
+def test_search_todos_without_terms_matches_nothing():
+    query = search_todos(select(Todo.id), ' ', 'sqlite')
+
+    assert 'MATCH' not in str(query.compile(dialect=sqlite.dialect()))
+
+
+def test_list_todos_search_with_cursor(client, token):
+    response = client.get(
+        '/todos/?q=milk&cursor=abc',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {
+        'detail': 'Cursor pagination is not supported with q'
+    }
+
+
 def test_patch_todo_erro(client, token):
     response = client.patch(
         '/todos/10',
@@ -212,6 +390,36 @@ async def test_patch_todo(client, user, token, session):
     assert response.json()['description'] == 'other description'
 
 
+@pytest.mark.asyncio
+async def test_todo_mutations_use_one_statement_plus_bookkeeping(
+    session, client, user, token, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    todo = {'title': 'a', 'description': 'b', 'state': 'todo'}
+
+    with count_queries(session.bind) as statements:
+        todo_id = client.post('/todos/', json=todo, headers=headers).json()[
+            'id'
+        ]
+        client.patch(f'/todos/{todo_id}', json={'title': 'c'}, headers=headers)
+        client.delete(f'/todos/{todo_id}', headers=headers)
+
+    # Each INSERT and DELETE is followed by the todo_counters upsert, and
+    # every change by the todo_versions upsert; a patch that keeps the state
+    # leaves the counters alone.
+    assert [statement.split()[0] for statement in statements] == [
+        'INSERT',
+        'INSERT',
+        'INSERT',
+        'UPDATE',
+        'INSERT',
+        'DELETE',
+        'INSERT',
+        'INSERT',
+    ]
+
+
 def test_error_delete_todo(client, token):
     response = client.delete(
         '/todos/10',
@@ -271,3 +479,356 @@ async def test_list_todos_exercicio_aula_9(
             'title': todo.title,
         }
     ]
+
+
+@pytest.mark.asyncio
+async def test_batch_todos(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(2, user_id=user.id))
+    await session.commit()
+
+    response = client.post(
+        '/todos/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'operations': [
+                {
+                    'op': 'create',
+                    'todo': {
+                        'title': 'new',
+                        'description': 'created in batch',
+                        'state': 'todo',
+                    },
+                },
+                {'op': 'update', 'id': 1, 'todo': {'title': 'changed'}},
+                {'op': 'delete', 'id': 2},
+            ]
+        },
+    )
+
+    data = response.json()
+    assert response.status_code == HTTPStatus.OK
+    assert data['applied'] is True
+    assert [result['status'] for result in data['results']] == [
+        HTTPStatus.CREATED,
+        HTTPStatus.OK,
+        HTTPStatus.OK,
+    ]
+    assert data['results'][0]['todo']['title'] == 'new'
+    assert data['results'][1]['todo']['title'] == 'changed'
+
+    todos = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    ).json()['todos']
+    assert {todo['title'] for todo in todos} == {'new', 'changed'}
+
+
+@pytest.mark.asyncio
+async def test_batch_todos_atomic_failure_applies_nothing(
+    session, client, user, other_user, token
+):
+    session.add(TodoFactory.create(user_id=other_user.id))
+    await session.commit()
+
+    response = client.post(
+        '/todos/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'operations': [
+                {
+                    'op': 'create',
+                    'todo': {
+                        'title': 'a',
+                        'description': 'b',
+                        'state': 'todo',
+                    },
+                },
+                {'op': 'delete', 'id': 1},
+            ]
+        },
+    )
+
+    data = response.json()
+    assert data['applied'] is False
+    assert [result['status'] for result in data['results']] == [
+        HTTPStatus.FAILED_DEPENDENCY,
+        HTTPStatus.NOT_FOUND,
+    ]
+    assert (
+        client.get(
+            '/todos/', headers={'Authorization': f'Bearer {token}'}
+        ).json()['todos']
+        == []
+    )
+
+
+@pytest.mark.asyncio
+async def test_batch_todos_best_effort(session, client, user, token):
+    session.add(TodoFactory.create(user_id=user.id))
+    await session.commit()
+
+    response = client.post(
+        '/todos/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'mode': 'best_effort',
+            'operations': [
+                {'op': 'delete', 'id': 1},
+                {'op': 'update', 'id': 1, 'todo': {'title': 'x'}},
+                {'op': 'delete', 'id': 10},
+            ],
+        },
+    )
+
+    data = response.json()
+    assert data['applied'] is True
+    assert [result['status'] for result in data['results']] == [
+        HTTPStatus.OK,
+        HTTPStatus.CONFLICT,
+        HTTPStatus.NOT_FOUND,
+    ]
+
+
+def test_batch_todos_too_many_operations(client, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_BATCH_MAX_OPERATIONS', 1)
+
+    response = client.post(
+        '/todos/batch',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'operations': [
+                {'op': 'delete', 'id': 1},
+                {'op': 'delete', 'id': 2},
+            ]
+        },
+    )
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {
+        'detail': 'Too many operations, the limit is 1.'
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_todos_ndjson(session, client, user, token, monkeypatch):
+    monkeypatch.setattr(settings, 'TODO_EXPORT_CHUNK_SIZE', 2)
+    session.add_all(TodoFactory.create_batch(5, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/export', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    todos = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [todo['id'] for todo in todos] == [1, 2, 3, 4, 5]
+    assert set(todos[0]) == {
+        'id',
+        'title',
+        'description',
+        'state',
+        'created_at',
+        'updated_at',
+    }
+
+
+@pytest.mark.asyncio
+async def test_export_todos_csv(session, client, user, token):
+    session.add_all(TodoFactory.create_batch(3, user_id=user.id))
+    await session.commit()
+
+    response = client.get(
+        '/todos/export?format=csv',
+        headers={'Authorization': f'Bearer {token}'},
+    )
+
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert response.headers['content-type'].startswith('text/csv')
+    assert [row['id'] for row in rows] == ['1', '2', '3']
+
+
+@pytest.mark.asyncio
+async def test_list_todos_not_modified(session, client, user, token):
+    session.add(TodoFactory.create(user_id=user.id))
+    await session.commit()
+    headers = {'Authorization': f'Bearer {token}'}
+
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+    assert not response.content
+
+
+@pytest.mark.asyncio
+async def test_list_todos_etag_changes_with_todos(
+    session, client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    session.add(TodoFactory.create(user_id=user.id))
+    await session.commit()
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['ETag'] != etag
+    assert len(response.json()['todos']) == 1
+
+
+def test_list_todos_etag_changes_with_patch_in_the_same_second(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo_id = client.post(
+        '/todos/',
+        json={'title': 'old', 'description': 'b', 'state': 'todo'},
+        headers=headers,
+    ).json()['id']
+    etag = client.get('/todos/', headers=headers).headers['ETag']
+
+    client.patch(f'/todos/{todo_id}', json={'title': 'new'}, headers=headers)
+    response = client.get(
+        '/todos/', headers={**headers, 'If-None-Match': etag}
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['todos'][0]['title'] == 'new'
+
+
+def test_list_todos_etag_depends_on_filters(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    everything = client.get('/todos/', headers=headers)
+    done = client.get('/todos/?state=done', headers=headers)
+
+    assert everything.headers['ETag'] != done.headers['ETag']
+
+
+def _stats(client, headers):
+    response = client.get('/todos/stats', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    return response.json()
+
+
+def test_todo_stats_follow_mutations(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo = {'title': 'a', 'description': 'b', 'state': 'todo'}
+    first = client.post('/todos/', json=todo, headers=headers).json()
+    client.post('/todos/', json=todo, headers=headers)
+
+    client.patch(
+        f'/todos/{first["id"]}', json={'state': 'done'}, headers=headers
+    )
+    stats = _stats(client, headers)
+
+    expected_total = 2
+    assert stats['total'] == expected_total
+    assert stats['states'] == {
+        'draft': 0,
+        'todo': 1,
+        'doing': 0,
+        'done': 1,
+        'trash': 0,
+    }
+
+    client.delete(f'/todos/{first["id"]}', headers=headers)
+
+    assert _stats(client, headers)['states']['done'] == 0
+
+
+def test_todo_stats_follow_batches(client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    todo = {'title': 'a', 'description': 'b', 'state': 'todo'}
+    ids = [
+        client.post('/todos/', json=todo, headers=headers).json()['id']
+        for _ in range(2)
+    ]
+
+    client.post(
+        '/todos/batch',
+        json={
+            'operations': [
+                {'op': 'create', 'todo': {**todo, 'state': 'draft'}},
+                {'op': 'update', 'id': ids[0], 'todo': {'state': 'doing'}},
+                {'op': 'delete', 'id': ids[1]},
+            ]
+        },
+        headers=headers,
+    )
+    stats = _stats(client, headers)
+
+    expected_total = 2
+    assert stats['total'] == expected_total
+    assert stats['states']['draft'] == 1
+    assert stats['states']['doing'] == 1
+    assert stats['states']['todo'] == 0
+
+
+@pytest.mark.asyncio
+async def test_todo_stats_rebuild_drifted_counters(
+    session, client, user, token
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    # Written behind the API's back, so no counter knows about them.
+    session.add_all(
+        TodoFactory.create_batch(3, user_id=user.id, state=TodoState.done)
+    )
+    await session.commit()
+
+    stats = _stats(client, headers)
+    counters = (
+        await session.execute(
+            select(TodoCounter.state, TodoCounter.count).where(
+                TodoCounter.user_id == user.id
+            )
+        )
+    ).all()
+
+    expected_done = 3
+    assert stats['states']['done'] == expected_done
+    assert counters == [(TodoState.done, expected_done)]
+
+
+@pytest.mark.asyncio
+async def test_rebuild_counters_over_existing_rows(session, user):
+    session.add_all(
+        TodoFactory.create_batch(2, user_id=user.id, state=TodoState.doing)
+    )
+    # As left by a concurrent adjust_counters: one row for a state the
+    # recount also produces, one for a state it no longer does.
+    await adjust_counters(
+        session, user.id, Counter({TodoState.doing: 1, TodoState.done: 4})
+    )
+
+    await rebuild_counters(session, user.id)
+    await session.commit()
+
+    counters = dict(
+        (
+            await session.execute(
+                select(TodoCounter.state, TodoCounter.count).where(
+                    TodoCounter.user_id == user.id
+                )
+            )
+        ).all()
+    )
+
+    expected_doing = 2
+    assert counters == {TodoState.doing: expected_doing, TodoState.done: 0}
+
+
+@pytest.mark.asyncio
+async def test_todo_stats_skip_recount_once_verified(
+    client, session, token, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    _stats(client, headers)
+
+    with count_queries(session.bind) as statements:
+        _stats(client, headers)
+
+    assert len(statements) == 1
@@ -0,0 +1,86 @@
+import json
+import threading
+from http import HTTPStatus
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from fast_zero import tracing
+from fast_zero.tracing import TraceWriter, TracingMiddleware, span
+
+
+def test_server_timing_header(client, user, token):
+    client.post(
+        '/auth/refresh_token', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    response = client.get(
+        '/todos/', headers={'Authorization': f'Bearer {token}'}
+    )
+
+    metrics = {
+        metric.split(';')[0]: metric
+        for metric in response.headers['Server-Timing'].split(', ')
+    }
+    assert {'auth', 'sql', 'render', 'app'} <= set(metrics)
+    # The ETag aggregate and the page itself.
+    assert metrics['queries'] == 'queries;desc="2"'
+
+
+def test_trace_file(tmp_path):
+    expected_records = 2
+    trace_file = tmp_path / 'traces.jsonl'
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, trace_file=str(trace_file))
+
+    @app.get('/work')
+    def work():
+        with span('step', detail='x'):
+            return {'ok': True}
+
+    with TestClient(app) as client:
+        client.get('/work')
+        client.get('/work')
+
+    records = [
+        json.loads(line) for line in trace_file.read_text().splitlines()
+    ]
+    assert len(records) == expected_records
+    assert records[0]['route'] == '/work'
+    assert records[0]['status'] == HTTPStatus.OK
+    assert records[0]['spans'][0]['name'] == 'step'
+    assert records[0]['spans'][0]['detail'] == 'x'
+
+
+def test_trace_file_is_written_off_the_event_loop(tmp_path, monkeypatch):
+    writer_threads = []
+
+    def recording_open(*args, **kwargs):
+        writer_threads.append(threading.current_thread().name)
+        return open(*args, **kwargs)
+
+    monkeypatch.setattr(tracing, 'open', recording_open, raising=False)
+    app = FastAPI()
+    app.add_middleware(
+        TracingMiddleware, trace_file=str(tmp_path / 'traces.jsonl')
+    )
+
+    @app.get('/work')
+    def work():
+        return {'ok': True}
+
+    with TestClient(app) as client:
+        client.get('/work')
+
+    assert writer_threads == ['trace-writer']
+
+
+def test_trace_writer_flush(tmp_path):
+    trace_file = tmp_path / 'traces.jsonl'
+    writer = TraceWriter(str(trace_file))
+
+    writer.write({'n': 1})
+    writer.write({'n': 2})
+    writer.flush()
+
+    assert trace_file.read_text() == '{"n": 1}\n{"n": 2}\n'
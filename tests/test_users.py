@@ -1,6 +1,12 @@
 from http import HTTPStatus
 
+import pytest
+from sqlalchemy import func, select
+
+from fast_zero.models import Todo, TodoCounter
+from fast_zero.routers import users
 from fast_zero.schemas import UserPublic
+from fast_zero.security import get_password_hash, verify_password
 
 
 def test_create_user_post(client):
@@ -24,13 +30,38 @@ def test_create_user_post(client):
 def test_read_users(client):
     response = client.get('/users')
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': []}
+    assert response.json() == {'users': [], 'next_cursor': None}
 
 
 def test_read_users_with_users(client, user):
     user_schema = UserPublic.model_validate(user).model_dump()
     response = client.get('/users/')
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None}
+
+
+def test_read_users_with_cursor(client, user, other_user):
+    first_page = client.get('/users/?limit=1').json()
+    second_page = client.get(
+        f'/users/?limit=1&cursor={first_page["next_cursor"]}'
+    ).json()
+
+    assert [u['id'] for u in first_page['users']] == [user.id]
+    assert [u['id'] for u in second_page['users']] == [other_user.id]
+    assert second_page['next_cursor'] is None
+
+
+@pytest.mark.parametrize('query', ['limit=0', 'limit=-1', 'offset=-1'])
+def test_read_users_rejects_invalid_page(client, query):
+    response = client.get(f'/users/?{query}')
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_read_users_with_invalid_cursor(client):
+    response = client.get('/users/?cursor=not-a-cursor')
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
 
 
 def test_update_user(client, user, token):
@@ -90,6 +121,30 @@ def test_delete_user(client, user, token):
     assert response.json() == {'message': 'User deleted'}
 
 
+@pytest.mark.asyncio
+async def test_delete_user_cascades_in_one_statement(
+    session, client, user, token, count_queries
+):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.post('/auth/refresh_token', headers=headers)
+    for state in ('todo', 'done'):
+        client.post(
+            '/todos/',
+            json={'title': 'a', 'description': 'b', 'state': state},
+            headers=headers,
+        )
+
+    with count_queries(session.bind) as statements:
+        response = client.delete(f'/users/{user.id}', headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert [statement.split()[0] for statement in statements] == ['DELETE']
+    for model in (Todo, TodoCounter):
+        assert (
+            await session.scalar(select(func.count()).select_from(model)) == 0
+        )
+
+
 def test_exerc_get_user_found(client, other_user):
     response = client.get(
         f'/users/{other_user.id}',
@@ -141,3 +196,87 @@ def test_exerc_post_already_exist_email(client, user):
     )
     assert response_create.status_code == HTTPStatus.BAD_REQUEST
     assert response_create.json() == {'detail': 'Email already exists'}
+
+
+@pytest.mark.asyncio
+async def test_create_user_conflict_keeps_existing_password(
+    client, session, user
+):
+    response = client.post(
+        '/users/',
+        json={
+            'username': user.username,
+            'email': user.email,
+            'password': 'mynewpassword',
+        },
+    )
+
+    await session.refresh(user)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Username already exists'}
+    assert verify_password(user.clean_password, user.password)
+
+
+def test_create_user_hashes_outside_a_transaction(
+    client, session, monkeypatch
+):
+    in_transaction = []
+
+    async def record_hash(password):
+        in_transaction.append(session.in_transaction())
+        return get_password_hash(password)
+
+    monkeypatch.setattr(users, 'get_password_hash_async', record_hash)
+
+    response = client.post(
+        '/users/',
+        json={
+            'username': 'alice',
+            'email': 'alice@example.com',
+            'password': 'secret',
+        },
+    )
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert in_transaction == [False]
+
+
+def test_create_user_skips_the_existence_check(client, session, count_queries):
+    with count_queries(session.bind) as statements:
+        client.post(
+            '/users/',
+            json={
+                'username': 'alice',
+                'email': 'alice@example.com',
+                'password': 'secret',
+            },
+        )
+
+    assert [statement.split()[0] for statement in statements] == ['INSERT']
+
+
+def test_get_user_not_modified(client, user):
+    etag = client.get(f'/users/{user.id}').headers['ETag']
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['ETag'] == etag
+
+
+def test_get_user_etag_changes_on_update(client, user, token):
+    etag = client.get(f'/users/{user.id}').headers['ETag']
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={
+            'username': 'bob',
+            'email': 'bob@example.com',
+            'password': 'mynewpassword',
+        },
+    )
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'bob'